@@ -2,9 +2,11 @@
 from .user_controller import UserController
 from .product_controller import ProductController
 from .order_controller import OrderController
+from .refresh_token_controller import RefreshTokenController
 
 __all__ = [
     'UserController',
     'ProductController',
     'OrderController',
+    'RefreshTokenController',
 ]
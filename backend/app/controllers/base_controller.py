@@ -1,25 +1,48 @@
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from ..core.pagination import Keyset
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
 
 class BaseController(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(self, model: Type[ModelType], keyset: Optional[Keyset] = None):
         """
         Base controller with default CRUD operations.
+
+        Listings are ordered by ``keyset``, newest first by default.
         """
         self.model = model
+        self.keyset = keyset or Keyset(model.created_at, model.id)
+
+    def paginate(self, stmt, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        return self.keyset.paginate(stmt, skip=skip, limit=limit, cursor=cursor)
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> List[ModelType]:
+        return db.execute(
+            self.paginate(select(self.model), skip=skip, limit=limit, cursor=cursor)
+        ).scalars().all()
+
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalars().first()
+
+    async def get_multi_async(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        result = await db.execute(
+            self.paginate(select(self.model), skip=skip, limit=limit, cursor=cursor)
+        )
+        return result.scalars().all()
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
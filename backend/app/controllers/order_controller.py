@@ -1,7 +1,28 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from .. import models, schemas
+from ..core.events import ORDER_STATUS_CHANGED, event_bus
 from .base_controller import BaseController
+from .product_controller import InsufficientStock, ProductController
+
+# Per-order outcomes of a bulk status update
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+INVALID_TRANSITION = "invalid_transition"
+INSUFFICIENT_STOCK = "insufficient_stock"
+NOT_FOUND = "not_found"
+
+class OrderStatusConflict(Exception):
+    """
+    Raised when an order's status changed underneath a status update.
+    """
+
+class InvalidStatusTransition(ValueError):
+    """
+    Raised when the order state machine does not allow a status change.
+    """
 
 class OrderController(BaseController[models.Order, schemas.OrderCreate, schemas.OrderUpdate]):
     """
@@ -9,82 +30,336 @@ class OrderController(BaseController[models.Order, schemas.OrderCreate, schemas.
     """
     def __init__(self):
         super().__init__(models.Order)
+        self.products = ProductController()
+    
+    def _item_options(self, include_products: bool = False):
+        """
+        Load items in one batched query per listing, optionally joining each
+        item's product name and unit into that same query.
+        """
+        items = selectinload(models.Order.items)
+        if include_products:
+            items = items.joinedload(models.OrderItem.product).load_only(
+                models.Product.name, models.Product.unit
+            )
+        return items
+    
+    def _list_stmt(
+        self, *filters, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        include_products: bool = False
+    ):
+        """
+        Newest-first order listing with items loaded alongside, as required by
+        async sessions where lazy loads are not available.
+        """
+        return self.paginate(
+            select(self.model)
+            .where(*filters)
+            .options(self._item_options(include_products)),
+            skip=skip, limit=limit, cursor=cursor
+        )
+    
+    def get_with_items(
+        self, db: Session, id: int, *, include_products: bool = False
+    ) -> Optional[models.Order]:
+        """
+        Retrieve one order with its items.
+        """
+        return db.execute(
+            select(self.model)
+            .where(models.Order.id == id)
+            .options(self._item_options(include_products))
+        ).scalars().first()
+    
+    def get_multi(
+        self, db: Session, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        include_products: bool = False
+    ) -> List[models.Order]:
+        """
+        Retrieve all orders with their items.
+        """
+        return db.execute(
+            self._list_stmt(skip=skip, limit=limit, cursor=cursor, include_products=include_products)
+        ).scalars().all()
     
     def get_multi_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None, include_products: bool = False
     ) -> List[models.Order]:
         """
-        Retrieve orders for a specific user.
+        Retrieve orders for a specific user with their items.
         """
-        return (
-            db.query(self.model)
-            .filter(models.Order.user_id == user_id)
-            .order_by(models.Order.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return db.execute(
+            self._list_stmt(
+                models.Order.user_id == user_id,
+                skip=skip, limit=limit, cursor=cursor, include_products=include_products
+            )
+        ).scalars().all()
     
     def get_multi_by_status(
-        self, db: Session, *, status: models.OrderStatus, skip: int = 0, limit: int = 100
+        self, db: Session, *, status: models.OrderStatus, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None, include_products: bool = False
+    ) -> List[models.Order]:
+        """
+        Retrieve orders by status with their items.
+        """
+        return db.execute(
+            self._list_stmt(
+                models.Order.status == status,
+                skip=skip, limit=limit, cursor=cursor, include_products=include_products
+            )
+        ).scalars().all()
+    
+    async def get_multi_async(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        include_products: bool = False
     ) -> List[models.Order]:
         """
-        Retrieve orders by status.
+        Retrieve all orders with their items.
         """
-        return (
-            db.query(self.model)
-            .filter(models.Order.status == status)
-            .order_by(models.Order.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        result = await db.execute(
+            self._list_stmt(skip=skip, limit=limit, cursor=cursor, include_products=include_products)
         )
+        return result.scalars().all()
+    
+    async def get_multi_by_user_async(
+        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None, include_products: bool = False
+    ) -> List[models.Order]:
+        """
+        Retrieve orders for a specific user with their items.
+        """
+        result = await db.execute(
+            self._list_stmt(
+                models.Order.user_id == user_id,
+                skip=skip, limit=limit, cursor=cursor, include_products=include_products
+            )
+        )
+        return result.scalars().all()
+    
+    async def get_multi_by_status_async(
+        self, db: AsyncSession, *, status: models.OrderStatus, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None, include_products: bool = False
+    ) -> List[models.Order]:
+        """
+        Retrieve orders by status with their items.
+        """
+        result = await db.execute(
+            self._list_stmt(
+                models.Order.status == status,
+                skip=skip, limit=limit, cursor=cursor, include_products=include_products
+            )
+        )
+        return result.scalars().all()
     
     def create_with_items(
         self, db: Session, *, obj_in: schemas.OrderCreate, user_id: int
     ) -> models.Order:
         """
-        Create a new order with order items.
+        Create a new order with order items in a single transaction.
+        
+        Prices come from the catalog (one IN query), never from the client.
+        Stock is reserved atomically, and the reservation, the order and all
+        items are written in one transaction; the returned order keeps its
+        flushed state instead of being reloaded. Raises ValueError if any
+        product does not exist and InsufficientStock if any is sold out.
         """
-        # Calculate total amount
-        total_amount = sum(
-            item.quantity * item.unit_price 
-            for item in obj_in.items
-        )
+        quantities: Dict[int, int] = {}
+        for item in obj_in.items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        products = {
+            row.id: row
+            for row in db.execute(
+                select(
+                    models.Product.id, models.Product.price,
+                    models.Product.supplier_id, models.Product.stock_shards
+                )
+                .where(models.Product.id.in_(quantities))
+            )
+        }
+        missing = quantities.keys() - products.keys()
+        if missing:
+            raise ValueError(f"Unknown product id(s): {', '.join(map(str, sorted(missing)))}")
+        try:
+            self.products.reserve_stock(
+                db, quantities, shards={row.id: row.stock_shards for row in products.values()}
+            )
+        except InsufficientStock:
+            db.rollback()
+            raise
         
-        # Create the order
+        items = [
+            models.OrderItem(
+                product_id=item.product_id,
+                quantity=item.quantity,
+                unit_price=products[item.product_id].price,
+            )
+            for item in obj_in.items
+        ]
+        supplier_ids = {row.supplier_id for row in products.values()}
         db_order = models.Order(
             user_id=user_id,
-            total_amount=total_amount,
-            status=obj_in.status,
+            # Orders spanning several suppliers are not attributed to any one of them
+            supplier_id=supplier_ids.pop() if len(supplier_ids) == 1 else None,
+            total_amount=sum(item.quantity * item.unit_price for item in items),
+            status=models.OrderStatus.PENDING,
             shipping_address=obj_in.shipping_address,
+            items=items,
         )
         db.add(db_order)
-        db.commit()
-        db.refresh(db_order)
-        
-        # Create order items
-        for item in obj_in.items:
-            db_item = models.OrderItem(
-                order_id=db_order.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-            )
-            db.add(db_item)
-        
-        db.commit()
-        db.refresh(db_order)
+        # Server defaults come back via RETURNING during the flush
+        db.flush()
+        expire_on_commit = db.expire_on_commit
+        db.expire_on_commit = False
+        try:
+            db.commit()
+        finally:
+            db.expire_on_commit = expire_on_commit
         return db_order
     
+    def item_quantities(self, db: Session, *order_ids: int) -> Dict[int, int]:
+        """
+        Units per product across the given orders.
+        """
+        return dict(db.execute(
+            select(models.OrderItem.product_id, func.sum(models.OrderItem.quantity))
+            .where(models.OrderItem.order_id.in_(order_ids))
+            .group_by(models.OrderItem.product_id)
+        ).all())
+    
     def update_status(
         self, db: Session, *, db_obj: models.Order, status: models.OrderStatus
     ) -> models.Order:
         """
         Update order status.
+        
+        Raises InvalidStatusTransition unless the state machine allows the
+        change. The change only applies if the status is still the one read, so
+        two concurrent cancellations cannot both release stock. Cancelling
+        returns the order's units to stock; reopening a cancelled order reserves
+        them again (InsufficientStock if they are gone).
         """
-        db_obj.status = status
-        db.add(db_obj)
+        previous = db_obj.status
+        if status == previous:
+            return db_obj
+        if status not in models.ORDER_STATUS_TRANSITIONS[previous]:
+            raise InvalidStatusTransition(
+                f"Cannot move order {db_obj.id} from {previous.value} to {status.value}"
+            )
+        result = db.execute(
+            update(models.Order)
+            .where(models.Order.id == db_obj.id, models.Order.status == previous)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.rollback()
+            raise OrderStatusConflict(f"Order {db_obj.id} is no longer {previous.value}")
+        try:
+            if status == models.OrderStatus.CANCELLED:
+                self.products.release_stock(db, self.item_quantities(db, db_obj.id))
+            elif previous == models.OrderStatus.CANCELLED:
+                self.products.reserve_stock(db, self.item_quantities(db, db_obj.id))
+        except InsufficientStock:
+            db.rollback()
+            raise
         db.commit()
         db.refresh(db_obj)
+        event_bus.publish(ORDER_STATUS_CHANGED, {"status": status, "order_ids": [db_obj.id]})
         return db_obj
+    
+    def _transition(
+        self, db: Session, order_ids: List[int], previous: frozenset, status: models.OrderStatus
+    ) -> List[int]:
+        """
+        Move the orders among ``order_ids`` whose status is in ``previous`` to
+        ``status`` in one statement; returns the ids that moved.
+        """
+        matched = (models.Order.id.in_(order_ids), models.Order.status.in_(previous))
+        stmt = (
+            update(models.Order)
+            .where(*matched)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        if db.get_bind().dialect.update_returning:
+            return list(db.execute(stmt.returning(models.Order.id)).scalars())
+        # Without RETURNING, lock the matching rows first so the ids stay accurate
+        ids = list(db.execute(select(models.Order.id).where(*matched).with_for_update()).scalars())
+        if ids:
+            db.execute(stmt.where(models.Order.id.in_(ids)))
+        return ids
+    
+    def bulk_update_status(
+        self, db: Session, *, order_ids: List[int], status: models.OrderStatus
+    ) -> List[Dict]:
+        """
+        Move many orders to ``status`` with set-based conditional UPDATEs.
+        
+        Each UPDATE only matches orders whose current status the state machine
+        allows moving from, so validation and the change happen in the same
+        statement and cannot race other updates. Cancelled orders release
+        their stock in one pass. Reopening cancelled orders re-reserves stock
+        in one transaction per order, so one sold-out order does not hold back
+        the rest. Returns one outcome per requested id and publishes a single
+        ORDER_STATUS_CHANGED event for the whole batch.
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        previous = models.allowed_previous_statuses(status)
+        outcomes: Dict[int, str] = {}
+        
+        plain = previous - {models.OrderStatus.CANCELLED}
+        if plain:
+            moved = self._transition(db, order_ids, plain, status)
+            if moved and status == models.OrderStatus.CANCELLED:
+                self.products.release_stock(db, self.item_quantities(db, *moved))
+            db.commit()
+            outcomes.update(dict.fromkeys(moved, UPDATED))
+        
+        if models.OrderStatus.CANCELLED in previous:
+            cancelled = frozenset({models.OrderStatus.CANCELLED})
+            reopen = list(db.execute(
+                select(models.Order.id).where(
+                    models.Order.id.in_([id for id in order_ids if id not in outcomes]),
+                    models.Order.status == models.OrderStatus.CANCELLED,
+                )
+            ).scalars())
+            for order_id in reopen:
+                if not self._transition(db, [order_id], cancelled, status):
+                    db.rollback()
+                    continue
+                try:
+                    self.products.reserve_stock(db, self.item_quantities(db, order_id))
+                except InsufficientStock:
+                    db.rollback()
+                    outcomes[order_id] = INSUFFICIENT_STOCK
+                    continue
+                db.commit()
+                outcomes[order_id] = UPDATED
+        
+        current = dict(db.execute(
+            select(models.Order.id, models.Order.status)
+            .where(models.Order.id.in_([id for id in order_ids if outcomes.get(id) != UPDATED]))
+        ).all())
+        db.rollback()
+        for order_id in order_ids:
+            if order_id in outcomes:
+                continue
+            if order_id not in current:
+                outcomes[order_id] = NOT_FOUND
+            elif current[order_id] == status:
+                outcomes[order_id] = UNCHANGED
+            else:
+                outcomes[order_id] = INVALID_TRANSITION
+        
+        updated = [order_id for order_id in order_ids if outcomes[order_id] == UPDATED]
+        if updated:
+            event_bus.publish(ORDER_STATUS_CHANGED, {"status": status, "order_ids": updated})
+        return [
+            {
+                "order_id": order_id,
+                "outcome": outcomes[order_id],
+                "status": status if outcomes[order_id] == UPDATED else current.get(order_id),
+            }
+            for order_id in order_ids
+        ]
@@ -1,8 +1,78 @@
-from typing import List, Optional
+import enum
+import random
+from typing import Any, Dict, Iterable, List, Optional, Union
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from .. import models, schemas
+from ..core.events import PRODUCTS_CHANGED, STOCK_CHANGED, event_bus
+from ..core.pagination import Keyset
+from ..search import ProductFilters, product_search
 from .base_controller import BaseController
 
+class ProductSort(str, enum.Enum):
+    NEWEST = "newest"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+    NAME = "name"
+
+# Each sort pages on an indexed (column, id) keyset, tagged with the sort so
+# its cursors only resume that sort
+SORT_KEYSETS = {
+    ProductSort.NEWEST: Keyset(models.Product.created_at, models.Product.id, tag=ProductSort.NEWEST.value),
+    ProductSort.PRICE_ASC: Keyset(
+        models.Product.price, models.Product.id, descending=False, tag=ProductSort.PRICE_ASC.value
+    ),
+    ProductSort.PRICE_DESC: Keyset(models.Product.price, models.Product.id, tag=ProductSort.PRICE_DESC.value),
+    ProductSort.NAME: Keyset(models.Product.name, models.Product.id, descending=False, tag=ProductSort.NAME.value),
+}
+
+# Session.info key collecting products whose stock the transaction changed
+STOCK_CHANGED_KEY = "stock_changed_product_ids"
+
+class InsufficientStock(ValueError):
+    """
+    Raised when a reservation would take more stock than is available.
+    """
+    def __init__(self, product_ids: Iterable[int]):
+        self.product_ids = sorted(product_ids)
+        super().__init__(
+            f"Insufficient stock for product id(s): {', '.join(map(str, self.product_ids))}"
+        )
+
+def split_evenly(total: int, parts: int) -> List[int]:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+def product_snapshot(product: models.Product) -> Dict[str, Any]:
+    """
+    The product fields carried by PRODUCTS_CHANGED events.
+    """
+    return {
+        "id": product.id,
+        "name": product.name,
+        "category": product.category,
+        "supplier_id": product.supplier_id,
+        "price": product.price,
+        "unit": product.unit,
+        "stock_quantity": product.stock_quantity,
+    }
+
+def mark_stock_changed(db: Session, product_ids: Iterable[int]) -> None:
+    """
+    Announce STOCK_CHANGED for ``product_ids`` once ``db`` commits.
+    """
+    db.info.setdefault(STOCK_CHANGED_KEY, set()).update(product_ids)
+
+@event.listens_for(Session, "after_commit")
+def _publish_stock_changes(session: Session) -> None:
+    product_ids = session.info.pop(STOCK_CHANGED_KEY, None)
+    if product_ids:
+        event_bus.publish(STOCK_CHANGED, {"product_ids": sorted(product_ids)})
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stock_changes(session: Session) -> None:
+    session.info.pop(STOCK_CHANGED_KEY, None)
+
 class ProductController(BaseController[models.Product, schemas.ProductCreate, schemas.ProductUpdate]):
     """
     Product controller with default CRUD operations and additional business logic.
@@ -10,60 +80,295 @@ class ProductController(BaseController[models.Product, schemas.ProductCreate, sc
     def __init__(self):
         super().__init__(models.Product)
     
+    def publish_changes(self, action: str, *snapshots: Dict[str, Any]) -> None:
+        """
+        Tell in-process catalog indexes about committed product changes.
+        """
+        event_bus.publish(PRODUCTS_CHANGED, {"action": action, "products": list(snapshots)})
+    
+    def create(
+        self, db: Session, *, obj_in: Union[schemas.ProductCreate, Dict[str, Any]]
+    ) -> models.Product:
+        product = super().create(db, obj_in=obj_in)
+        self.publish_changes("upsert", product_snapshot(product))
+        return product
+    
+    def remove(self, db: Session, *, id: int) -> models.Product:
+        product = db.get(models.Product, id)
+        snapshot = product_snapshot(product)
+        db.delete(product)
+        db.commit()
+        self.publish_changes("delete", snapshot)
+        return product
+    
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[models.Product]:
         """
         Retrieve products for a specific owner.
         """
-        return (
-            db.query(self.model)
-            .filter(models.Product.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return db.execute(
+            self.paginate(
+                select(self.model).where(models.Product.owner_id == owner_id),
+                skip=skip, limit=limit, cursor=cursor
+            )
+        ).scalars().all()
     
     def get_multi_by_category(
-        self, db: Session, *, category: models.ProductCategory, skip: int = 0, limit: int = 100
+        self, db: Session, *, category: models.ProductCategory, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[models.Product]:
         """
         Retrieve products by category.
         """
-        return (
-            db.query(self.model)
-            .filter(models.Product.category == category)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return db.execute(
+            self.paginate(
+                select(self.model).where(models.Product.category == category),
+                skip=skip, limit=limit, cursor=cursor
+            )
+        ).scalars().all()
     
     def update_stock(
         self, db: Session, *, db_obj: models.Product, quantity_change: int
     ) -> models.Product:
         """
-        Update product stock quantity.
+        Atomically adjust product stock; raises InsufficientStock rather than
+        going negative.
         """
-        db_obj.stock_quantity += quantity_change
-        db.add(db_obj)
+        try:
+            if quantity_change < 0:
+                self.reserve_stock(db, {db_obj.id: -quantity_change})
+            elif quantity_change > 0:
+                self.release_stock(db, {db_obj.id: quantity_change})
+        except InsufficientStock:
+            db.rollback()
+            raise
         db.commit()
         db.refresh(db_obj)
         return db_obj
     
+    def _shard_counts(self, db: Session, product_ids: Iterable[int]) -> Dict[int, int]:
+        return dict(db.execute(
+            select(models.Product.id, models.Product.stock_shards)
+            .where(models.Product.id.in_(list(product_ids)), models.Product.stock_shards > 0)
+        ).all())
+    
+    def reserve_stock(
+        self, db: Session, quantities: Dict[int, int], shards: Optional[Dict[int, int]] = None
+    ) -> None:
+        """
+        Take ``quantities`` (product id -> units) out of stock.
+        
+        Every decrement is a conditional UPDATE that only matches while enough
+        stock remains, so concurrent orders cannot oversell or lose updates.
+        Products are locked in ascending id order, so orders sharing products
+        cannot deadlock. Runs in the caller's transaction; on InsufficientStock
+        the caller must roll back. ``shards`` (product id -> shard count) saves
+        a lookup when the caller already has it.
+        """
+        if shards is None:
+            shards = self._shard_counts(db, quantities)
+        short = []
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            if shards.get(product_id):
+                taken = self._take_from_shards(db, product_id, quantity, shards[product_id])
+            else:
+                taken = db.execute(
+                    update(models.Product)
+                    .where(models.Product.id == product_id, models.Product.stock_quantity >= quantity)
+                    .values(stock_quantity=models.Product.stock_quantity - quantity)
+                    .execution_options(synchronize_session=False)
+                ).rowcount == 1
+            if not taken:
+                short.append(product_id)
+        if short:
+            raise InsufficientStock(short)
+        mark_stock_changed(db, quantities)
+    
+    def release_stock(
+        self, db: Session, quantities: Dict[int, int], shards: Optional[Dict[int, int]] = None
+    ) -> None:
+        """
+        Return ``quantities`` to stock (cancelled orders, restocking).
+        """
+        if shards is None:
+            shards = self._shard_counts(db, quantities)
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            if shards.get(product_id):
+                stmt = (
+                    update(models.ProductStockShard)
+                    .where(
+                        models.ProductStockShard.product_id == product_id,
+                        models.ProductStockShard.shard == random.randrange(shards[product_id]),
+                    )
+                    .values(quantity=models.ProductStockShard.quantity + quantity)
+                )
+            else:
+                stmt = (
+                    update(models.Product)
+                    .where(models.Product.id == product_id)
+                    .values(stock_quantity=models.Product.stock_quantity + quantity)
+                )
+            db.execute(stmt.execution_options(synchronize_session=False))
+        mark_stock_changed(db, quantities)
+    
+    def _take_shard(self, db: Session, product_id: int, shard: int, quantity: int) -> bool:
+        return db.execute(
+            update(models.ProductStockShard)
+            .where(
+                models.ProductStockShard.product_id == product_id,
+                models.ProductStockShard.shard == shard,
+                models.ProductStockShard.quantity >= quantity,
+            )
+            .values(quantity=models.ProductStockShard.quantity - quantity)
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+    
+    def _take_from_shards(self, db: Session, product_id: int, quantity: int, shard_count: int) -> bool:
+        # Usually one shard covers the order: start at a random one so
+        # concurrent buyers spread over different rows
+        start = random.randrange(shard_count)
+        for offset in range(shard_count):
+            if self._take_shard(db, product_id, (start + offset) % shard_count, quantity):
+                return True
+        # Otherwise split it over shards, locking them in ascending order
+        remaining = quantity
+        rows = db.execute(
+            select(models.ProductStockShard.shard, models.ProductStockShard.quantity)
+            .where(models.ProductStockShard.product_id == product_id)
+            .order_by(models.ProductStockShard.shard)
+        ).all()
+        for shard, available in rows:
+            take = min(remaining, available)
+            if take > 0 and self._take_shard(db, product_id, shard, take):
+                remaining -= take
+            if remaining == 0:
+                return True
+        return False
+    
+    def configure_stock_shards(
+        self, db: Session, *, db_obj: models.Product, shards: int, total: Optional[int] = None
+    ) -> models.Product:
+        """
+        Spread a product's stock (or ``total``, if given) over ``shards``
+        counters; 0 folds it back into stock_quantity.
+        """
+        product = db.execute(
+            select(models.Product).where(models.Product.id == db_obj.id).with_for_update()
+        ).scalar_one()
+        if total is None:
+            total = self._current_stock(db, product)
+        db.query(models.ProductStockShard).filter(
+            models.ProductStockShard.product_id == product.id
+        ).delete(synchronize_session=False)
+        for shard, quantity in enumerate(split_evenly(total, shards) if shards else []):
+            db.add(models.ProductStockShard(product_id=product.id, shard=shard, quantity=quantity))
+        product.stock_shards = shards
+        product.stock_quantity = total
+        mark_stock_changed(db, [product.id])
+        db.commit()
+        db.refresh(product)
+        return product
+    
+    def _current_stock(self, db: Session, product: models.Product) -> int:
+        if not product.stock_shards:
+            return product.stock_quantity
+        return db.execute(
+            select(func.coalesce(func.sum(models.ProductStockShard.quantity), 0))
+            .where(models.ProductStockShard.product_id == product.id)
+        ).scalar_one()
+    
+    def update(
+        self, db: Session, *, db_obj: models.Product, obj_in: Union[schemas.ProductUpdate, Dict[str, Any]]
+    ) -> models.Product:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        product = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        if product.stock_shards and update_data.get("stock_quantity") is not None:
+            # A stock level set directly on a sharded product is redistributed
+            # over its shards
+            product = self.configure_stock_shards(
+                db, db_obj=product, shards=product.stock_shards, total=update_data["stock_quantity"]
+            )
+        self.publish_changes("upsert", product_snapshot(product))
+        return product
+    
+    def rollup_stock_shards(self, db: Session) -> None:
+        """
+        Refresh stock_quantity of sharded products from their shards; only
+        products whose total moved are written and announced.
+        """
+        shard_total = (
+            select(func.coalesce(func.sum(models.ProductStockShard.quantity), 0))
+            .where(models.ProductStockShard.product_id == models.Product.id)
+            .scalar_subquery()
+        )
+        stale = (models.Product.stock_shards > 0, models.Product.stock_quantity != shard_total)
+        stmt = (
+            update(models.Product)
+            .where(*stale)
+            .values(stock_quantity=shard_total)
+            .execution_options(synchronize_session=False)
+        )
+        if db.get_bind().dialect.update_returning:
+            ids = list(db.execute(stmt.returning(models.Product.id)).scalars())
+        else:
+            # Without RETURNING, lock the stale rows first so the ids stay accurate
+            ids = list(db.execute(select(models.Product.id).where(*stale).with_for_update()).scalars())
+            if ids:
+                db.execute(stmt.where(models.Product.id.in_(ids)))
+        mark_stock_changed(db, ids)
+        db.commit()
+    
     def search(
-        self, db: Session, *, query: str, skip: int = 0, limit: int = 100
+        self, db: Session, *, query: str, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[models.Product]:
+        """
+        Full-text search over product names and descriptions, best match first.
+        """
+        return product_search.search(db, query=query, skip=skip, limit=limit, cursor=cursor)
+    
+    async def get_multi_by_category_async(
+        self, db: AsyncSession, *, category: models.ProductCategory, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[models.Product]:
+        """
+        Retrieve products by category.
+        """
+        result = await db.execute(
+            self.paginate(
+                select(self.model).where(models.Product.category == category),
+                skip=skip, limit=limit, cursor=cursor
+            )
+        )
+        return result.scalars().all()
+    
+    async def search_async(
+        self, db: AsyncSession, *, query: str, filters: Optional[ProductFilters] = None,
+        skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> List[models.Product]:
+        """
+        Full-text search over product names and descriptions, best match first.
+        """
+        return await product_search.search_async(
+            db, query=query, criteria=filters.criteria() if filters else (),
+            skip=skip, limit=limit, cursor=cursor
+        )
+    
+    async def browse_async(
+        self, db: AsyncSession, *, filters: ProductFilters, sort: ProductSort = ProductSort.NEWEST,
+        skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[models.Product]:
         """
-        Search products by name or description.
+        Products matching every filter, paged along the sort's keyset.
         """
-        search = f"%{query}%"
-        return (
-            db.query(self.model)
-            .filter(
-                (models.Product.name.ilike(search)) |
-                (models.Product.description.ilike(search))
+        result = await db.execute(
+            SORT_KEYSETS[sort].paginate(
+                select(self.model).where(*filters.criteria()),
+                skip=skip, limit=limit, cursor=cursor
             )
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return result.scalars().all()
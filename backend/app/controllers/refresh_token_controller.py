@@ -0,0 +1,143 @@
+import hashlib
+import hmac
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+
+
+class RefreshTokenError(Exception):
+    """
+    Raised when a refresh token is unknown, expired or revoked.
+    """
+
+
+class RefreshTokenReuseError(RefreshTokenError):
+    """
+    Raised when an already rotated refresh token is presented again.
+    """
+
+
+class RefreshTokenController:
+    """
+    Issues and rotates server-tracked refresh tokens.
+
+    Only an HMAC of each token is stored. Every refresh marks the presented token
+    as used and issues a successor in the same family; presenting a used token
+    again revokes the whole family.
+    """
+    def __init__(self):
+        self.model = models.RefreshToken
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hmac.new(
+            settings.SECRET_KEY.encode("utf-8"),
+            token.encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+
+    def issue(
+        self, db: Session, *, user_id: int, family_id: Optional[str] = None
+    ) -> str:
+        """
+        Create a refresh token for a user and return its raw value.
+
+        The new row is added to the session; the caller commits.
+        """
+        token = secrets.token_urlsafe(32)
+        db.add(self.model(
+            user_id=user_id,
+            token_hash=self.hash_token(token),
+            family_id=family_id or str(uuid.uuid4()),
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ))
+        return token
+
+    def rotate(self, db: Session, *, token: str) -> Tuple[int, str]:
+        """
+        Exchange a refresh token for a new one, returning ``(user_id, new_token)``.
+
+        Tokens of missing or deactivated users get their family revoked
+        instead of a successor.
+        """
+        now = datetime.utcnow()
+        db_obj = (
+            db.query(self.model)
+            .filter(self.model.token_hash == self.hash_token(token))
+            .first()
+        )
+        if not db_obj or db_obj.revoked_at is not None or db_obj.expires_at <= now:
+            raise RefreshTokenError("Invalid refresh token")
+
+        is_active = (
+            db.query(models.User.is_active)
+            .filter(models.User.id == db_obj.user_id)
+            .scalar()
+        )
+        if not is_active:
+            self.revoke_family(db, family_id=db_obj.family_id)
+            db.commit()
+            raise RefreshTokenError("Inactive user")
+
+        # Conditional update so two concurrent refreshes cannot both win
+        claimed = (
+            db.query(self.model)
+            .filter(
+                self.model.id == db_obj.id,
+                self.model.used_at.is_(None),
+                self.model.revoked_at.is_(None),
+            )
+            .update({self.model.used_at: now}, synchronize_session=False)
+        )
+        if not claimed:
+            self.revoke_family(db, family_id=db_obj.family_id)
+            db.commit()
+            raise RefreshTokenReuseError("Refresh token reuse detected")
+
+        new_token = self.issue(db, user_id=db_obj.user_id, family_id=db_obj.family_id)
+        db.commit()
+        return db_obj.user_id, new_token
+
+    def revoke_family(self, db: Session, *, family_id: str) -> int:
+        """
+        Revoke every live token in a family.
+        """
+        return (
+            db.query(self.model)
+            .filter(
+                self.model.family_id == family_id,
+                self.model.revoked_at.is_(None),
+            )
+            .update({self.model.revoked_at: datetime.utcnow()}, synchronize_session=False)
+        )
+
+    def revoke_for_user(self, db: Session, *, user_id: int) -> int:
+        """
+        Revoke every live token belonging to a user.
+        """
+        return (
+            db.query(self.model)
+            .filter(
+                self.model.user_id == user_id,
+                self.model.revoked_at.is_(None),
+            )
+            .update({self.model.revoked_at: datetime.utcnow()}, synchronize_session=False)
+        )
+
+    def purge_expired(self, db: Session) -> int:
+        """
+        Bulk delete expired tokens.
+        """
+        deleted = (
+            db.query(self.model)
+            .filter(self.model.expires_at < datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return deleted
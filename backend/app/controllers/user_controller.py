@@ -1,9 +1,26 @@
-from typing import Optional
+from typing import Any, Dict, Optional, Union
 from sqlalchemy.orm import Session
 from .. import models, schemas
-from ..core.security import get_password_hash, verify_password
+from ..core.principal import invalidate_principal
+from ..core.security import get_password_hash, rehash_password_if_needed, verify_password_async
 from .base_controller import BaseController
 
+async def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
+    """
+    The user with these credentials, or None. Hashes made with another cost
+    than the current one are rewritten while the password is known.
+    """
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    new_hash = await rehash_password_if_needed(password, user.hashed_password)
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+    return user
+
 class UserController(BaseController[models.User, schemas.UserCreate, schemas.UserUpdate]):
     """
     User controller with default CRUD operations and additional business logic.
@@ -17,13 +34,19 @@ class UserController(BaseController[models.User, schemas.UserCreate, schemas.Use
         """
         return db.query(self.model).filter(models.User.email == email).first()
     
-    def create(self, db: Session, *, obj_in: schemas.UserCreate) -> models.User:
+    def create(
+        self, db: Session, *, obj_in: schemas.UserCreate, hashed_password: Optional[str] = None
+    ) -> models.User:
         """
         Create a new user with hashed password.
+
+        Callers on the request path should hash with ``get_password_hash_blocking``
+        (or ``get_password_hash_async``) and pass ``hashed_password`` so bcrypt
+        runs on the hashing pool.
         """
         db_obj = models.User(
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=hashed_password or get_password_hash(obj_in.password),
             full_name=obj_in.full_name,
             role=obj_in.role if obj_in.role else "consumer"
         )
@@ -32,13 +55,40 @@ class UserController(BaseController[models.User, schemas.UserCreate, schemas.Use
         db.refresh(db_obj)
         return db_obj
     
-    def authenticate(self, db: Session, email: str, password: str) -> Optional[models.User]:
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: models.User,
+        obj_in: Union[schemas.UserUpdate, Dict[str, Any]]
+    ) -> models.User:
         """
-        Authenticate user with email and password.
+        Update a user and drop its cached principal.
         """
-        user = self.get_by_email(db, email=email)
-        if not user:
-            return None
-        if not verify_password(password, user.hashed_password):
-            return None
+        user = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        invalidate_principal(user.id)
         return user
+    
+    def remove(self, db: Session, *, id: int) -> models.User:
+        """
+        Delete a user and drop its cached principal.
+
+        Revocations of the user's access tokens are kept, detached from the
+        row, until they expire.
+        """
+        db.query(models.RefreshToken).filter(
+            models.RefreshToken.user_id == id
+        ).delete(synchronize_session=False)
+        db.query(models.RevokedToken).filter(
+            models.RevokedToken.user_id == id
+        ).update({models.RevokedToken.user_id: None}, synchronize_session=False)
+        user = super().remove(db, id=id)
+        invalidate_principal(id)
+        return user
+    
+    async def authenticate(self, db: Session, email: str, password: str) -> Optional[models.User]:
+        """
+        Authenticate user with email and password, rehashing on success when
+        the cost changed.
+        """
+        return await authenticate_user(db, email=email, password=password)
@@ -1,4 +1,25 @@
 from .config import settings
-from .security import get_password_hash, verify_password, create_access_token, decode_token
+from .security import (
+    get_password_hash,
+    verify_password,
+    get_password_hash_async,
+    get_password_hash_blocking,
+    verify_password_async,
+    create_access_token,
+    decode_token,
+    verify_token,
+    purge_token_cache,
+)
 
-__all__ = ["settings", "get_password_hash", "verify_password", "create_access_token", "decode_token"]
+__all__ = [
+    "settings",
+    "get_password_hash",
+    "verify_password",
+    "get_password_hash_async",
+    "get_password_hash_blocking",
+    "verify_password_async",
+    "create_access_token",
+    "decode_token",
+    "verify_token",
+    "purge_token_cache",
+]
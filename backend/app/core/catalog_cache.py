@@ -0,0 +1,246 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import CatalogVersion, Product
+from .cache import TTLCache
+from .config import settings
+from .events import PRODUCTS_CHANGED, STOCK_CHANGED, event_bus
+
+# Header set on catalog reads, telling whether the body came from the cache
+CACHE_STATUS_HEADER = "X-Cache"
+
+# Cache key kinds
+PRODUCT = "product"
+PRODUCT_LIST = "products"
+SUPPLIER = "supplier"
+
+# catalog_versions row bumped by product writes, which every worker polls
+PRODUCTS_VERSION = "products"
+# Product columns whose changes alone do not bump it
+STOCK_COLUMNS = frozenset({"stock_quantity", "updated_at"})
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _is_catalog_write(product: Product, deleted: bool) -> bool:
+    state = inspect(product)
+    if deleted or state.pending or not state.has_identity:
+        return True
+    changed = {attr.key for attr in state.attrs if attr.history.has_changes()}
+    return bool(changed - STOCK_COLUMNS)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_catalog_version(session: Session, flush_context) -> None:
+    """
+    Bump the products version in the flushing transaction when a product
+    was created, deleted or edited beyond its stock.
+    """
+    products = [
+        (obj, obj in session.deleted)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, Product)
+    ]
+    if any(_is_catalog_write(product, deleted) for product, deleted in products):
+        session.connection().execute(
+            update(CatalogVersion)
+            .where(CatalogVersion.name == PRODUCTS_VERSION)
+            .values(version=CatalogVersion.version + 1)
+        )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match comparison; weak validators compare equal to strong ones.
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class CatalogCache:
+    """
+    Read-through cache of serialized catalog responses with strong ETags.
+
+    Product and supplier reads are kept by id, product listings by their full
+    query string, each as the exact JSON body sent plus its ETag, so a hit
+    skips the database and serialization, and a matching If-None-Match gets
+    304 Not Modified. PRODUCTS_CHANGED drops the products' entries and every
+    cached listing. STOCK_CHANGED, published on every order, drops only
+    per-product entries; listings may show stock up to ``list_ttl`` seconds
+    old. Entries are per worker. Product writes also bump a row in
+    ``catalog_versions``, which each worker polls at most once per
+    ``sync_interval``, clearing its cache when the version moved; stock
+    changes made through other workers are left to expire. Suppliers are not
+    written through the API, so their entries simply expire.
+    """
+    def __init__(self, maxsize: int, ttl: float, list_ttl: float, sync_interval: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lists = TTLCache(maxsize=maxsize, ttl=list_ttl)
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        # Generations of invalidated keys and of the listings; a read that
+        # started before its key's generation moved does not store what it
+        # loaded, as that may predate the write. Clearing everything bumps
+        # the epoch instead.
+        self._epoch = 0
+        self._generations: Dict[Hashable, int] = {}
+        self._list_generation = 0
+        self._catalog_version: Optional[int] = None
+        self._last_sync = 0.0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.syncs = 0
+        event_bus.subscribe(PRODUCTS_CHANGED, self._on_products_changed)
+        event_bus.subscribe(STOCK_CHANGED, self._on_stock_changed)
+
+    @staticmethod
+    def product_key(product_id: int) -> tuple:
+        return (PRODUCT, product_id)
+
+    @staticmethod
+    def supplier_key(supplier_id: int) -> tuple:
+        return (SUPPLIER, supplier_id)
+
+    @staticmethod
+    def product_list_key(request: Request) -> tuple:
+        return (PRODUCT_LIST, tuple(sorted(request.query_params.multi_items())))
+
+    def _cache_for(self, key: Hashable) -> TTLCache:
+        return self.lists if key[0] == PRODUCT_LIST else self.entries
+
+    def _version(self, key: Hashable) -> Tuple[int, int]:
+        if key[0] == PRODUCT_LIST:
+            return (self._epoch, self._list_generation)
+        return (self._epoch, self._generations.get(key, 0))
+
+    def version_for(self, key: Hashable) -> Tuple[int, int]:
+        """
+        Token to take before loading ``key`` and hand back to ``fill``.
+        """
+        with self._lock:
+            return self._version(key)
+
+    def _sync_due(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sync < self.sync_interval:
+                return False
+            self._last_sync = now
+            return True
+
+    def _apply_version(self, version: Optional[int]) -> None:
+        with self._lock:
+            changed = self._catalog_version is not None and version != self._catalog_version
+            self._catalog_version = version
+            self.syncs += 1
+            if changed:
+                self._epoch += 1
+                self._generations.clear()
+                self.entries.clear()
+                self.lists.clear()
+                self.invalidations += 1
+
+    @staticmethod
+    def _version_statement():
+        return select(CatalogVersion.version).where(CatalogVersion.name == PRODUCTS_VERSION)
+
+    async def sync_async(self, db: AsyncSession) -> None:
+        """
+        Drop everything if products were written by any worker since the
+        last sync; checks at most once per ``sync_interval``.
+        """
+        if self._sync_due():
+            self._apply_version((await db.execute(self._version_statement())).scalar())
+
+    def _respond(self, request: Request, cached: CachedBody, status: str) -> Response:
+        headers = {
+            **cached.headers,
+            "ETag": cached.etag,
+            # Clients keep the body but revalidate it on every use
+            "Cache-Control": "no-cache",
+            CACHE_STATUS_HEADER: status,
+        }
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+    def respond(self, request: Request, key: Hashable) -> Optional[Response]:
+        """
+        The cached response for ``key``, or None on a miss.
+        """
+        cached = self._cache_for(key).get(key)
+        if cached is None:
+            return None
+        return self._respond(request, cached, "HIT")
+
+    def fill(
+        self, request: Request, key: Hashable, content: Any, *, version: Tuple[int, int],
+        headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        """
+        Serialize ``content``, cache it under ``key`` unless ``key`` was
+        invalidated since ``version`` was taken, and respond with it.
+        """
+        body = json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        cached = CachedBody(body=body, etag=etag_for(body), headers=dict(headers or {}))
+        with self._lock:
+            if version == self._version(key):
+                self._cache_for(key).set(key, cached)
+        return self._respond(request, cached, "MISS")
+
+    def _invalidate(self, keys, *, lists: bool = False) -> None:
+        with self._lock:
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self.entries.invalidate(key)
+            if lists:
+                self._list_generation += 1
+                self.lists.clear()
+            self.invalidations += 1
+
+    def _on_products_changed(self, payload: Dict[str, Any]) -> None:
+        self._invalidate([self.product_key(product["id"]) for product in payload["products"]], lists=True)
+
+    def _on_stock_changed(self, payload: Dict[str, Any]) -> None:
+        self._invalidate([self.product_key(product_id) for product_id in payload["product_ids"]])
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": self.entries.metrics(),
+                "lists": self.lists.metrics(),
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+                "syncs": self.syncs,
+            }
+
+
+catalog_cache = CatalogCache(
+    maxsize=settings.CATALOG_CACHE_SIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+    list_ttl=settings.CATALOG_LIST_CACHE_TTL_SECONDS,
+    sync_interval=settings.CATALOG_CACHE_SYNC_SECONDS,
+)
@@ -1,5 +1,7 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
+import os
+import tempfile
 
 class Settings(BaseSettings):
     # Database settings
@@ -9,11 +11,84 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "supply_chain"
     DATABASE_URL: Optional[str] = None
+
+    # Connection pool settings
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+
+    # Read replica settings (comma-separated URLs; empty disables routing)
+    REPLICA_DATABASE_URLS: str = ""
+    REPLICA_EJECT_SECONDS: int = 30
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # SQL accounting settings (statements at or over the threshold are logged)
+    SLOW_QUERY_MS: int = 200
+
+    # Sharded stock: how often product stock_quantity is refreshed from its shards
+    STOCK_SHARD_ROLLUP_SECONDS: float = 5.0
+
+    # N+1 lazy-load detection for development and tests ("off", "warn" or "raise")
+    NPLUSONE_DETECTION: str = "off"
+    NPLUSONE_THRESHOLD: int = 5
+
+    # Idempotency-Key settings: how long responses are kept for replay, how long a
+    # duplicate waits on the in-flight original, and when an unfinished one is abandoned
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_LOCK_SECONDS: float = 60.0
+
+    # Supplier search: max age of the in-process trigram index used without pg_trgm
+    SUPPLIER_SEARCH_REFRESH_SECONDS: float = 60.0
+
+    # Autocomplete: how often names and popularity are reloaded in full
+    AUTOCOMPLETE_REFRESH_SECONDS: float = 300.0
+
+    # Catalog facets: max age of the in-process facet counts before a full reload
+    FACETS_REFRESH_SECONDS: float = 300.0
+
+    # Catalog response cache: product/supplier reads by id, and product listings
+    # (which tolerate stock levels up to CATALOG_LIST_CACHE_TTL_SECONDS old)
+    CATALOG_CACHE_SIZE: int = 10000
+    CATALOG_CACHE_TTL_SECONDS: float = 300.0
+    CATALOG_LIST_CACHE_TTL_SECONDS: float = 30.0
+    # How often each worker checks the database for catalog writes made by others
+    CATALOG_CACHE_SYNC_SECONDS: float = 1.0
     
     # Security settings
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+
+    # Password hashing settings (BCRYPT_TARGET_MS enables startup calibration)
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: Optional[int] = None
+
+    # Password hashing pool settings
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Authenticated principal cache settings
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Verified token cache settings
+    TOKEN_CACHE_SIZE: int = 10000
+
+    # Token revocation settings
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_SYNC_INTERVAL_SECONDS: float = 5.0
+
+    # Login throttling settings ("sqlite" shares counters between workers on a host)
+    LOGIN_THROTTLE_BACKEND: str = "sqlite"
+    LOGIN_THROTTLE_SQLITE_PATH: str = os.path.join(tempfile.gettempdir(), "supply_chain_login_throttle.sqlite3")
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = 300
+    LOGIN_THROTTLE_MAX_PER_EMAIL: int = 10
+    LOGIN_THROTTLE_MAX_PER_IP: int = 50
 
     class Config:
         env_file = ".env"
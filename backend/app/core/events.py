@@ -0,0 +1,64 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Topics published by the controllers. Catalog topics carry
+# {"action": "upsert" | "delete", "products" | "suppliers": [snapshot, ...]};
+# STOCK_CHANGED carries {"product_ids": [...]} whose stock levels moved
+ORDER_STATUS_CHANGED = "orders.status_changed"
+PRODUCTS_CHANGED = "products.changed"
+SUPPLIERS_CHANGED = "suppliers.changed"
+STOCK_CHANGED = "products.stock_changed"
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for change notifications.
+
+    Handlers run synchronously in the publishing thread, after the change has
+    been committed. A failing handler is logged and does not affect the
+    publisher or other handlers. Events are per worker process; anything that
+    must be seen by every worker still has to go through the database.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, List[Handler]] = {}
+        self.published: Dict[str, int] = {}
+        self.failures = 0
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        with self._lock:
+            self._handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe(self, topic: str, handler: Handler) -> None:
+        with self._lock:
+            handlers = self._handlers.get(topic, [])
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def publish(self, topic: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            handlers = list(self._handlers.get(topic, ()))
+            self.published[topic] = self.published.get(topic, 0) + 1
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                logger.exception("Event handler %r failed for %s", handler, topic)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": {topic: len(handlers) for topic, handlers in self._handlers.items()},
+                "published": dict(self.published),
+                "failures": self.failures,
+            }
+
+
+event_bus = EventBus()
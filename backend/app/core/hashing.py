@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from .config import settings
+
+
+class HashingPoolSaturated(Exception):
+    """
+    Raised when the password hashing queue is full and the job is rejected.
+    """
+
+
+class PasswordHashingPool:
+    """
+    Bounded executor for bcrypt work.
+
+    bcrypt releases the GIL while hashing, so a small dedicated thread pool keeps
+    hashing off the event loop and off Starlette's shared threadpool. Jobs beyond
+    ``workers + max_queue`` are rejected immediately instead of queueing forever.
+    """
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._completed += 1
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise HashingPoolSaturated("Password hashing queue is full")
+            self._pending += 1
+            self._submitted += 1
+        return self._executor.submit(self._run, fn, *args)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` on the pool and await its result.
+        """
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` on the pool and wait for it, for sync handlers that
+        already run in Starlette's threadpool.
+        """
+        return self._submit(fn, *args).result()
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Snapshot of queue depth and throughput counters.
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+
+password_pool = PasswordHashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
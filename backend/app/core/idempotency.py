@@ -0,0 +1,281 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import IdempotencyKey
+from .config import settings
+
+# Header clients send, and the one set on responses served from the store
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# How often a duplicate re-checks the store while the original is in flight
+POLL_SECONDS = 0.05
+
+
+class IdempotencyError(Exception):
+    """
+    A request whose Idempotency-Key cannot be honoured.
+    """
+    status_code = 400
+
+    def __init__(self, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class IdempotencyKeyReused(IdempotencyError):
+    """
+    The key was already used for a different request body.
+    """
+    status_code = 422
+
+
+class IdempotencyInProgress(IdempotencyError):
+    """
+    The original request is still running after the wait budget ran out.
+    """
+    status_code = 409
+
+
+def request_fingerprint(payload: Any) -> str:
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Persisted Idempotency-Key -> response store.
+
+    The first request with a key claims it by inserting an ``in_flight`` row
+    (the unique constraint settles races between workers), runs the handler and
+    stores the serialized response. Duplicates arriving meanwhile wait for that
+    row to complete, and later ones are answered from the stored response alone.
+    A handler that fails releases the key so the client can retry. Claims left
+    behind by a crashed worker are taken over after ``lock_seconds``.
+    """
+    def __init__(self, ttl_seconds: int, wait_seconds: float, lock_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.lock_seconds = lock_seconds
+        self._lock = threading.Lock()
+        # Wakes duplicates in this worker as soon as the original finishes
+        self._done: Dict[int, threading.Event] = {}
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self.conflicts = 0
+
+    def run(
+        self,
+        db: Session,
+        *,
+        key: Optional[str],
+        scope: str,
+        owner: str,
+        payload: Any,
+        handler: Callable[[], Any],
+        status_code: int = 200,
+        response_model: Any = None,
+    ) -> Any:
+        """
+        Run ``handler`` at most once per (scope, owner, key).
+
+        Without a key the handler's result is returned as is. With one, the
+        response is a JSONResponse of the handler's result serialized through
+        ``response_model``, or the stored copy of it on replays.
+        """
+        if key is None:
+            return handler()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyError(f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+        request_hash = request_fingerprint(payload)
+        claimed = self._claim(db, scope, owner, key, request_hash)
+        if isinstance(claimed, JSONResponse):
+            return claimed
+        try:
+            result = handler()
+            content = jsonable_encoder(
+                response_model.model_validate(result) if response_model is not None else result
+            )
+        except Exception:
+            db.rollback()
+            self._release(db, claimed)
+            raise
+        self._complete(db, claimed, status_code, content)
+        return JSONResponse(status_code=status_code, content=content)
+
+    def _claim(self, db: Session, scope: str, owner: str, key: str, request_hash: str):
+        """
+        Id of a newly claimed in-flight row, or the stored response to replay.
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        waited = False
+        while True:
+            now = datetime.utcnow()
+            record = IdempotencyKey(
+                scope=scope,
+                owner=owner,
+                key=key,
+                request_hash=request_hash,
+                status="in_flight",
+                created_at=now,
+                expires_at=now + timedelta(seconds=self.ttl_seconds),
+            )
+            db.add(record)
+            try:
+                db.flush()
+                record_id = record.id
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+            else:
+                with self._lock:
+                    self.executed += 1
+                    self._done[record_id] = threading.Event()
+                return record_id
+
+            row = db.execute(
+                select(
+                    IdempotencyKey.id,
+                    IdempotencyKey.request_hash,
+                    IdempotencyKey.status,
+                    IdempotencyKey.response_status,
+                    IdempotencyKey.response_body,
+                    IdempotencyKey.created_at,
+                    IdempotencyKey.expires_at,
+                ).where(
+                    IdempotencyKey.scope == scope,
+                    IdempotencyKey.owner == owner,
+                    IdempotencyKey.key == key,
+                )
+            ).one_or_none()
+            db.rollback()
+            if row is None:
+                # Released or purged between our insert and this read
+                continue
+            if row.expires_at <= now:
+                self._drop(db, row.id, IdempotencyKey.expires_at <= now)
+                continue
+            if row.request_hash != request_hash:
+                with self._lock:
+                    self.conflicts += 1
+                raise IdempotencyKeyReused(
+                    f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                )
+            if row.status == "completed":
+                with self._lock:
+                    self.replayed += 1
+                    if waited:
+                        self.waited += 1
+                return JSONResponse(
+                    status_code=row.response_status,
+                    content=json.loads(row.response_body),
+                    headers={REPLAYED_HEADER: "true"},
+                )
+            if row.created_at <= now - timedelta(seconds=self.lock_seconds):
+                taken = db.execute(
+                    update(IdempotencyKey)
+                    .where(
+                        IdempotencyKey.id == row.id,
+                        IdempotencyKey.status == "in_flight",
+                        IdempotencyKey.created_at == row.created_at,
+                    )
+                    .values(created_at=now)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                if taken == 1:
+                    with self._lock:
+                        self.executed += 1
+                        self._done[row.id] = threading.Event()
+                    return row.id
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self.conflicts += 1
+                raise IdempotencyInProgress(
+                    "A request with this Idempotency-Key is still being processed",
+                    retry_after=1,
+                )
+            waited = True
+            with self._lock:
+                done = self._done.get(row.id)
+            if done is not None:
+                done.wait(min(POLL_SECONDS, remaining))
+            else:
+                time.sleep(min(POLL_SECONDS, remaining))
+
+    def _complete(self, db: Session, record_id: int, status_code: int, content: Any) -> None:
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == record_id)
+            .values(
+                status="completed",
+                response_status=status_code,
+                response_body=json.dumps(content, separators=(",", ":")),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        self._finish(record_id)
+
+    def _release(self, db: Session, record_id: int) -> None:
+        self._drop(db, record_id, IdempotencyKey.status == "in_flight")
+        self._finish(record_id)
+
+    def _drop(self, db: Session, record_id: int, *criteria) -> None:
+        db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.id == record_id, *criteria)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def _finish(self, record_id: int) -> None:
+        with self._lock:
+            done = self._done.pop(record_id, None)
+        if done is not None:
+            done.set()
+
+    def purge_expired(self, db: Session) -> int:
+        """
+        Bulk delete keys whose replay window has passed.
+        """
+        deleted = db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.expires_at < datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return deleted
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "in_flight": len(self._done),
+                "executed": self.executed,
+                "replayed": self.replayed,
+                "waited": self.waited,
+                "conflicts": self.conflicts,
+            }
+
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+    lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+)
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..models import User
+from .cache import TTLCache
+from .config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Immutable snapshot of the authenticated user used for authorization checks.
+
+    Routes that need the full ``User`` row (profile reads/updates) load it
+    explicitly by ``id``.
+    """
+    id: int
+    email: str
+    role: str
+    is_active: bool
+
+
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """
+    Return the principal for ``user_id``, reading through the principal cache.
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    row = (
+        db.query(User.id, User.email, User.role, User.is_active)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    principal = Principal(
+        id=row.id,
+        email=row.email,
+        role=row.role,
+        is_active=bool(row.is_active),
+    )
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    Drop the cached principal after the user row changes.
+    """
+    principal_cache.invalidate(user_id)
@@ -0,0 +1,158 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import RevokedToken
+from .bloom import BloomFilter
+from .config import settings
+
+
+def _user_key(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+def _whole_seconds(moment: datetime) -> datetime:
+    # Token iat claims only have whole seconds
+    return moment.replace(microsecond=0)
+
+
+class RevocationList:
+    """
+    Per-worker view of the revoked-token table.
+
+    Lookups go to a Bloom filter first; the database is only consulted when the
+    filter reports a possible match. Workers notice revocations made elsewhere by
+    polling ``max(revoked_tokens.id)`` at most once per sync interval and
+    rebuilding the filter when it moved.
+    """
+    def __init__(self, capacity: int, error_rate: float, sync_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        self._version: Optional[int] = None
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.filter_positives = 0
+        self.confirmed = 0
+        self.rebuilds = 0
+
+    def _rebuild(self, db: Session, version: int) -> None:
+        keys = [
+            row.jti for row in
+            db.query(RevokedToken.jti)
+            .filter(RevokedToken.expires_at > datetime.utcnow())
+            .distinct()
+        ]
+        bloom = BloomFilter(max(self.capacity, len(keys) * 2), self.error_rate)
+        for key in keys:
+            bloom.add(key)
+        with self._lock:
+            self._filter = bloom
+            self._version = version
+            self.rebuilds += 1
+
+    def sync(self, db: Session, force: bool = False) -> None:
+        """
+        Rebuild the filter if another worker revoked something since the last sync.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        version = db.query(func.max(RevokedToken.id)).scalar() or 0
+        if force or version != self._version:
+            self._rebuild(db, version)
+
+    def is_revoked(self, db: Session, payload: Dict[str, Any]) -> bool:
+        """
+        Return True if the token described by ``payload`` has been revoked.
+        """
+        self.sync(db)
+        self.checks += 1
+        jti = payload.get("jti")
+        user_key = _user_key(payload.get("sub"))
+
+        if jti and jti in self._filter:
+            self.filter_positives += 1
+            exists = db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first()
+            if exists:
+                self.confirmed += 1
+                return True
+
+        if user_key in self._filter:
+            self.filter_positives += 1
+            revoked_at = (
+                db.query(func.max(RevokedToken.revoked_at))
+                .filter(RevokedToken.jti == user_key)
+                .scalar()
+            )
+            issued_at = payload.get("iat")
+            # Tokens issued in the second of the revocation stay valid, so a
+            # login right after a revoke-all (or re-enabling) is not rejected
+            if revoked_at and (
+                issued_at is None
+                or datetime.utcfromtimestamp(issued_at) < _whole_seconds(revoked_at)
+            ):
+                self.confirmed += 1
+                return True
+
+        return False
+
+    def _add(self, db: Session, key: str, user_id: Optional[int], expires_at: datetime) -> None:
+        db.add(RevokedToken(
+            jti=key, user_id=user_id, revoked_at=_whole_seconds(datetime.utcnow()), expires_at=expires_at
+        ))
+        db.commit()
+        with self._lock:
+            self._filter.add(key)
+
+    def revoke_token(self, db: Session, *, jti: str, user_id: Optional[int], expires_at: datetime) -> None:
+        """
+        Revoke a single access token until it would have expired anyway.
+        """
+        self._add(db, jti, user_id, expires_at)
+
+    def revoke_user(self, db: Session, *, user_id: int) -> None:
+        """
+        Revoke every access token issued to a user before the current second.
+
+        The user is identified by the ``user:<id>`` marker alone, not the
+        users foreign key, so the revocation can outlive a deleted user.
+        """
+        expires_at = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        self._add(db, _user_key(user_id), None, expires_at)
+
+    def purge_expired(self, db: Session) -> int:
+        """
+        Bulk delete revocations for tokens that have expired on their own.
+        """
+        deleted = (
+            db.query(RevokedToken)
+            .filter(RevokedToken.expires_at < datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return deleted
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "version": self._version,
+            "filter_entries": self._filter.count,
+            "checks": self.checks,
+            "filter_positives": self.filter_positives,
+            "confirmed": self.confirmed,
+            "rebuilds": self.rebuilds,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    sync_interval=settings.REVOCATION_SYNC_INTERVAL_SECONDS,
+)
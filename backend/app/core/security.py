@@ -1,10 +1,29 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
+import hashlib
+import threading
+import time
+import uuid
 import bcrypt
 
 from jose import JWTError, jwt
 
 from ..core.config import settings
+from .cache import TTLCache
+from .hashing import password_pool
+
+# Payloads of tokens whose signature and claims have already been verified
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+_token_stats_lock = threading.Lock()
+_token_stats = {"verifications": 0, "verify_seconds": 0.0}
+
+# bcrypt cost used for new hashes; may be replaced by calibrate_bcrypt_rounds()
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+bcrypt_rounds = settings.BCRYPT_ROUNDS
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -33,10 +52,71 @@ def get_password_hash(password: str) -> str:
         password = password_bytes[:72].decode('utf-8', errors='ignore')
     
     # Hash with bcrypt
-    salt = bcrypt.gensalt(rounds=12)
+    salt = bcrypt.gensalt(rounds=bcrypt_rounds)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
+def get_hash_rounds(hashed_password: str) -> Optional[int]:
+    """
+    Read the cost factor from a bcrypt hash such as ``$2b$12$...``.
+    """
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True if a stored hash was made with another cost than the current one,
+    so lowering ``BCRYPT_ROUNDS`` (or a calibrated cost) also takes effect.
+    """
+    rounds = get_hash_rounds(hashed_password)
+    return rounds != bcrypt_rounds
+
+def calibrate_bcrypt_rounds(target_ms: float) -> int:
+    """
+    Benchmark bcrypt on this host and adopt the highest cost that stays within
+    ``target_ms`` per hash. Each extra round doubles the cost.
+    """
+    global bcrypt_rounds
+    password = b"calibration-password"
+    started = time.perf_counter()
+    bcrypt.hashpw(password, bcrypt.gensalt(rounds=BCRYPT_MIN_ROUNDS))
+    base_ms = (time.perf_counter() - started) * 1000
+
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - BCRYPT_MIN_ROUNDS) <= target_ms:
+        rounds += 1
+    bcrypt_rounds = rounds
+    return rounds
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the bounded hashing pool without blocking the event loop.
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the bounded hashing pool without blocking the event loop.
+    """
+    return await password_pool.run(get_password_hash, password)
+
+def get_password_hash_blocking(password: str) -> str:
+    """
+    Hash a password on the bounded hashing pool from a sync handler.
+    """
+    return password_pool.run_blocking(get_password_hash, password)
+
+async def rehash_password_if_needed(plain_password: str, hashed_password: str) -> Optional[str]:
+    """
+    Return a new hash at the current cost for a verified password, or None if
+    the stored hash already uses it.
+    """
+    if not password_needs_rehash(hashed_password):
+        return None
+    return await get_password_hash_async(plain_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -47,7 +127,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     
-    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode, 
         settings.SECRET_KEY, 
@@ -55,16 +135,63 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt
 
+def _token_cache_key(token: str) -> tuple:
+    # Scope entries to the signing key so a rotated key never serves old payloads
+    key_id = hashlib.sha256(settings.SECRET_KEY.encode("utf-8")).digest()[:8]
+    return key_id, hashlib.sha256(token.encode("utf-8")).digest()
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT and return its payload, raising ``JWTError`` if it is invalid.
+
+    Verified payloads are cached by token digest until the token's ``exp``.
+    """
+    cache_key = _token_cache_key(token)
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        if payload.get("exp") is None or payload["exp"] > time.time():
+            return dict(payload)
+        token_cache.invalidate(cache_key)
+
+    started = time.perf_counter()
+    payload = jwt.decode(
+        token,
+        settings.SECRET_KEY,
+        algorithms=[settings.ALGORITHM]
+    )
+    with _token_stats_lock:
+        _token_stats["verifications"] += 1
+        _token_stats["verify_seconds"] += time.perf_counter() - started
+
+    exp = payload.get("exp")
+    ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+    if ttl is None or ttl > 0:
+        token_cache.set(cache_key, payload, ttl=ttl)
+    return dict(payload)
+
+def purge_token_cache() -> None:
+    """
+    Drop all cached token verifications, e.g. after rotating ``SECRET_KEY``.
+    """
+    token_cache.clear()
+
+def token_cache_metrics() -> Dict[str, Any]:
+    """
+    Cache counters plus the cost of the full verifications that missed it.
+    """
+    metrics = token_cache.metrics()
+    with _token_stats_lock:
+        verifications = _token_stats["verifications"]
+        seconds = _token_stats["verify_seconds"]
+    metrics["verifications"] = verifications
+    metrics["avg_verify_ms"] = round(seconds * 1000 / verifications, 4) if verifications else 0.0
+    return metrics
+
 def decode_token(token: str) -> dict:
     """
     Decode a JWT token.
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        return payload
+        return verify_token(token)
     except JWTError:
         return {}
@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .config import settings
+
+# How often the SQLite backend deletes attempts that fell out of the window
+PRUNE_SECONDS = 60.0
+
+
+class MemoryThrottleBackend:
+    """
+    Sliding-window attempt log kept in process memory (single worker only).
+    """
+    def __init__(self):
+        self._events: Dict[str, Deque[float]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def hit(self, limits: List[Tuple[str, int]], window: float, now: float) -> Optional[float]:
+        with self._lock:
+            retry_after = None
+            for key, limit in limits:
+                events = self._events[key]
+                while events and events[0] <= now - window:
+                    events.popleft()
+                if len(events) >= limit:
+                    wait = events[0] + window - now
+                    retry_after = max(retry_after or 0.0, wait)
+            if retry_after is not None:
+                return retry_after
+            for key, _ in limits:
+                self._events[key].append(now)
+            return None
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._events.pop(key, None)
+
+    def refund(self, key: str) -> None:
+        with self._lock:
+            events = self._events.get(key)
+            if events:
+                events.pop()
+
+
+class SQLiteThrottleBackend:
+    """
+    Sliding-window attempt log in a local SQLite file shared by all workers on a host.
+    """
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS login_attempts (key TEXT NOT NULL, ts REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_login_attempts_key_ts ON login_attempts (key, ts)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_login_attempts_ts ON login_attempts (ts)"
+        )
+        self._lock = threading.Lock()
+        self._pruned_at = 0.0
+
+    def hit(self, limits: List[Tuple[str, int]], window: float, now: float) -> Optional[float]:
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired rows are ignored by the counts; deleting them is
+                # housekeeping and need not run on every attempt
+                if now - self._pruned_at >= PRUNE_SECONDS:
+                    cur.execute("DELETE FROM login_attempts WHERE ts <= ?", (now - window,))
+                    self._pruned_at = now
+                retry_after = None
+                for key, limit in limits:
+                    count, oldest = cur.execute(
+                        "SELECT COUNT(*), MIN(ts) FROM login_attempts WHERE key = ? AND ts > ?",
+                        (key, now - window),
+                    ).fetchone()
+                    if count >= limit:
+                        retry_after = max(retry_after or 0.0, oldest + window - now)
+                if retry_after is None:
+                    cur.executemany(
+                        "INSERT INTO login_attempts (key, ts) VALUES (?, ?)",
+                        [(key, now) for key, _ in limits],
+                    )
+                cur.execute("COMMIT")
+                return retry_after
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM login_attempts WHERE key = ?", (key,))
+
+    def refund(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM login_attempts WHERE rowid = "
+                "(SELECT rowid FROM login_attempts WHERE key = ? ORDER BY ts DESC LIMIT 1)",
+                (key,),
+            )
+
+
+class LoginThrottle:
+    """
+    Limits login attempts per email and per client IP over a sliding window.
+
+    Attempts are recorded when admitted, before the password is checked, so a
+    burst is shed without paying for bcrypt. A successful login clears the
+    email's window and gives back its attempt on the IP's, so only failures
+    count against clients sharing an address. Both calls block on the
+    backend; async callers run them in a threadpool.
+    """
+    def __init__(self, backend, window: float, max_per_email: int, max_per_ip: int):
+        self.backend = backend
+        self.window = window
+        self.max_per_email = max_per_email
+        self.max_per_ip = max_per_ip
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return f"email:{email.strip().lower()}"
+
+    @staticmethod
+    def _ip_key(client_ip: str) -> str:
+        return f"ip:{client_ip}"
+
+    def check(self, email: str, client_ip: Optional[str]) -> Optional[float]:
+        """
+        Record an attempt, or return the seconds to wait if it must be rejected.
+        """
+        limits = [(self._email_key(email), self.max_per_email)]
+        if client_ip:
+            limits.append((self._ip_key(client_ip), self.max_per_ip))
+        retry_after = self.backend.hit(limits, self.window, time.time())
+        with self._lock:
+            if retry_after is None:
+                self.admitted += 1
+            else:
+                self.rejected += 1
+        return retry_after
+
+    def reset(self, email: str, client_ip: Optional[str] = None) -> None:
+        """
+        Forget the email's attempts after a successful login, and refund the
+        attempt it was charged on ``client_ip``.
+        """
+        self.backend.clear(self._email_key(email))
+        if client_ip:
+            self.backend.refund(self._ip_key(client_ip))
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {"admitted": self.admitted, "rejected": self.rejected}
+
+
+def _create_backend():
+    if settings.LOGIN_THROTTLE_BACKEND == "sqlite":
+        return SQLiteThrottleBackend(settings.LOGIN_THROTTLE_SQLITE_PATH)
+    return MemoryThrottleBackend()
+
+
+login_throttle = LoginThrottle(
+    backend=_create_backend(),
+    window=settings.LOGIN_THROTTLE_WINDOW_SECONDS,
+    max_per_email=settings.LOGIN_THROTTLE_MAX_PER_EMAIL,
+    max_per_ip=settings.LOGIN_THROTTLE_MAX_PER_IP,
+)
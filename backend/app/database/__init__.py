@@ -1,3 +1,23 @@
-from .database import engine, SessionLocal, Base, get_db
+from .database import (
+    engine,
+    SessionLocal,
+    Base,
+    get_db,
+    get_read_db,
+    async_engine,
+    AsyncSessionLocal,
+    get_async_db,
+    replica_router,
+)
 
-__all__ = ["engine", "SessionLocal", "Base", "get_db"]
+__all__ = [
+    "engine",
+    "SessionLocal",
+    "Base",
+    "get_db",
+    "get_read_db",
+    "async_engine",
+    "AsyncSessionLocal",
+    "get_async_db",
+    "replica_router",
+]
@@ -1,18 +1,94 @@
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
+from .instrumentation import instrument_engine
+from .nplusone import nplusone_detector
+from .pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from .routing import AsyncRoutingSession, Replica, ReplicaRouter, RoutingSession
 
 # Create the database URL
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL or \
     f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
 
+# Async drivers used for each sync backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """Translate a sync database URL to its async driver equivalent"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()]).render_as_string(hide_password=False)
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Connection pool options for an engine on the given URL"""
+    parsed = make_url(url)
+    options = {}
+    if parsed.get_backend_name() == "sqlite":
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        # In-memory SQLite keeps its own single-connection pool
+        if not parsed.database or parsed.database == ":memory:":
+            return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
 # Create the SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
 
 # Create a SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and sessions for handlers that should not pin a threadpool thread
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL),
+    **engine_options(SQLALCHEMY_DATABASE_URL, is_async=True)
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, sync_session_class=AsyncRoutingSession,
+    autoflush=False, expire_on_commit=False
+)
+
+# Optional read replicas for safe (GET) requests
+replica_router = ReplicaRouter(
+    [
+        Replica(
+            url,
+            create_engine(url, **engine_options(url)),
+            create_async_engine(async_database_url(url), **engine_options(url, is_async=True)),
+        )
+        for url in (u.strip() for u in settings.REPLICA_DATABASE_URLS.split(","))
+        if url
+    ],
+    eject_seconds=settings.REPLICA_EJECT_SECONDS,
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+# Time every statement and attribute it to the request that issued it
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+for replica in replica_router.replicas:
+    instrument_engine(replica.engine, name=f"replica {replica.url}")
+    instrument_engine(replica.async_engine.sync_engine, name=f"replica {replica.url}")
+
+# Optionally flag repeated lazy loads (N+1 queries) per request
+nplusone_detector.install()
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -23,3 +99,20 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """Dependency that provides a session reading from a replica when allowed"""
+    db = ReadSessionLocal()
+    if replica_router.use_replica(request):
+        db.replica = replica_router.choose()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db(request: Request):
+    """Dependency that provides an async database session, replica-routed for reads"""
+    async with AsyncSessionLocal() as db:
+        if replica_router.use_replica(request):
+            db.sync_session.replica = replica_router.choose()
+        yield db
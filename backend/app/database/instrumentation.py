@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on distinct routes tracked, in case unmatched paths leak through
+MAX_TRACKED_ROUTES = 500
+
+
+class RequestStats:
+    """
+    SQL issued while serving one request.
+
+    The route is resolved lazily from the ASGI scope, so statements run after
+    routing are tagged with the route template rather than the raw path.
+    """
+    def __init__(self, method: str, scope: Optional[Dict[str, Any]] = None):
+        self.method = method
+        self._scope = scope
+        self.query_count = 0
+        self.db_time_ms = 0.0
+        self.slow_queries = 0
+        self.lazy_loads: Dict[str, int] = {}
+
+    @property
+    def route(self) -> str:
+        route = self._scope.get("route") if self._scope is not None else None
+        return f"{self.method} {getattr(route, 'path', '<unmatched>')}"
+
+    def record(self, elapsed_ms: float, slow: bool) -> None:
+        self.query_count += 1
+        self.db_time_ms += elapsed_ms
+        if slow:
+            self.slow_queries += 1
+
+
+# Stats for the request being served; None outside a request (startup, scripts)
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class SQLMetrics:
+    """
+    Process-wide statement counters plus per-route request aggregates.
+    """
+    def __init__(self, slow_query_ms: float):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.slow_statements = 0
+        self.total_time_ms = 0.0
+        self._routes: Dict[str, Dict[str, float]] = {}
+
+    def observe_statement(self, elapsed_ms: float, slow: bool) -> None:
+        with self._lock:
+            self.statements += 1
+            self.total_time_ms += elapsed_ms
+            if slow:
+                self.slow_statements += 1
+
+    def observe_request(self, stats: RequestStats) -> None:
+        route = stats.route
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                if len(self._routes) >= MAX_TRACKED_ROUTES:
+                    return
+                entry = self._routes[route] = {
+                    "requests": 0, "queries": 0, "db_time_ms": 0.0,
+                    "max_queries": 0, "max_db_time_ms": 0.0, "slow_queries": 0,
+                }
+            entry["requests"] += 1
+            entry["queries"] += stats.query_count
+            entry["db_time_ms"] += stats.db_time_ms
+            entry["max_queries"] = max(entry["max_queries"], stats.query_count)
+            entry["max_db_time_ms"] = max(entry["max_db_time_ms"], stats.db_time_ms)
+            entry["slow_queries"] += stats.slow_queries
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": entry["requests"],
+                    "avg_queries": round(entry["queries"] / entry["requests"], 2),
+                    "max_queries": entry["max_queries"],
+                    "avg_db_time_ms": round(entry["db_time_ms"] / entry["requests"], 3),
+                    "max_db_time_ms": round(entry["max_db_time_ms"], 3),
+                    "slow_queries": entry["slow_queries"],
+                }
+                for route, entry in self._routes.items()
+            }
+            return {
+                "slow_query_ms": self.slow_query_ms,
+                "statements": self.statements,
+                "slow_statements": self.slow_statements,
+                "total_time_ms": round(self.total_time_ms, 3),
+                "routes": routes,
+            }
+
+
+sql_metrics = SQLMetrics(slow_query_ms=settings.SLOW_QUERY_MS)
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Describe bound parameters by type only, so values never reach the logs.
+    """
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def instrument_engine(engine: Engine, name: str = "primary") -> None:
+    """
+    Time every statement on ``engine`` and attribute it to the current request.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - context._query_started) * 1000
+        slow = elapsed_ms >= sql_metrics.slow_query_ms
+        sql_metrics.observe_statement(elapsed_ms, slow)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.record(elapsed_ms, slow)
+        if slow:
+            logger.warning(
+                "Slow query (%.1f ms) on %s for %s: %s | params=%s",
+                elapsed_ms,
+                name,
+                stats.route if stats is not None else "<no request>",
+                " ".join(statement.split()),
+                redact_parameters(parameters, executemany),
+            )
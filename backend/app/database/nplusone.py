@@ -0,0 +1,78 @@
+import logging
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from ..core.config import settings
+from .instrumentation import current_request_stats
+
+logger = logging.getLogger(__name__)
+
+# Detection modes for NPLUSONE_DETECTION
+MODES = {"off", "warn", "raise"}
+
+
+class NPlusOneError(Exception):
+    """
+    Raised in "raise" mode when a request repeats the same lazy load too often.
+    """
+
+
+class NPlusOneDetector:
+    """
+    Flags requests that lazy-load the same relationship once per parent row.
+
+    Every ORM statement issued by a lazy load is fingerprinted by the
+    relationship it loads (e.g. ``Order.items``) and counted against the
+    current request. Reaching ``threshold`` loads of one fingerprint either
+    logs a warning or raises ``NPlusOneError``, once per fingerprint per
+    request. Eager loads (``selectinload``/``joinedload``) are not counted.
+    """
+    def __init__(self, mode: str, threshold: int):
+        if mode not in MODES:
+            raise ValueError(f"NPLUSONE_DETECTION must be one of {sorted(MODES)}, got {mode!r}")
+        self.mode = mode
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.detections: Dict[str, int] = {}
+
+    def install(self) -> None:
+        if self.mode != "off":
+            event.listen(Session, "do_orm_execute", self._on_orm_execute)
+
+    def _on_orm_execute(self, orm_execute_state: ORMExecuteState) -> None:
+        if not orm_execute_state.is_relationship_load or orm_execute_state.lazy_loaded_from is None:
+            return
+        stats = current_request_stats.get()
+        if stats is None:
+            return
+        fingerprint = str(orm_execute_state.loader_strategy_path[-1])
+        count = stats.lazy_loads.get(fingerprint, 0) + 1
+        stats.lazy_loads[fingerprint] = count
+        if count != self.threshold:
+            return
+        with self._lock:
+            self.detections[fingerprint] = self.detections.get(fingerprint, 0) + 1
+        message = (
+            f"N+1 query: {stats.route} lazy-loaded {fingerprint} {count} times; "
+            f"add selectinload/joinedload for it"
+        )
+        if self.mode == "raise":
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "threshold": self.threshold,
+                "detections": dict(self.detections),
+            }
+
+
+nplusone_detector = NPlusOneDetector(
+    mode=settings.NPLUSONE_DETECTION,
+    threshold=settings.NPLUSONE_THRESHOLD,
+)
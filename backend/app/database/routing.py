@@ -0,0 +1,163 @@
+import itertools
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+
+# Methods that never write and may be served from a replica
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Time of the client's last write, set on write responses. Browsers send the
+# cookie back; other clients echo the header on their next requests.
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+class Replica:
+    """
+    One read replica: its sync engine (async engines expose theirs via
+    ``sync_engine``) plus health state.
+    """
+    def __init__(self, url: str, engine: Engine, async_engine=None):
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.async_engine = async_engine
+        self.ejected_until = 0.0
+        self.reads = 0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+
+class ReplicaRouter:
+    """
+    Round-robin selection over healthy replicas with read-your-writes stickiness.
+
+    A replica whose connections fail is ejected for ``eject_seconds``. Clients
+    that wrote recently are pinned to the primary for ``sticky_seconds`` so they
+    see their own changes despite replication lag. The time of the last write
+    travels with the client (cookie or header), so stickiness holds whichever
+    worker serves the next read.
+    """
+    def __init__(self, replicas: List[Replica], eject_seconds: float, sticky_seconds: float):
+        self.replicas = replicas
+        self.eject_seconds = eject_seconds
+        self._cycle = itertools.count()
+        self.sticky_seconds = sticky_seconds
+        self._lock = threading.Lock()
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        for replica in replicas:
+            self._watch(replica, replica.engine)
+            if replica.async_engine is not None:
+                self._watch(replica, replica.async_engine.sync_engine)
+
+    def _watch(self, replica: Replica, engine: Engine) -> None:
+        @event.listens_for(engine, "handle_error")
+        def _on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.eject(replica)
+
+    def eject(self, replica: Replica) -> None:
+        with self._lock:
+            replica.failures += 1
+            replica.ejected_until = time.monotonic() + self.eject_seconds
+
+    def choose(self) -> Optional[Replica]:
+        """
+        Next healthy replica in round-robin order, or None to use the primary.
+        """
+        if not self.replicas:
+            return None
+        with self._lock:
+            start = next(self._cycle)
+            for offset in range(len(self.replicas)):
+                replica = self.replicas[(start + offset) % len(self.replicas)]
+                if replica.healthy:
+                    replica.reads += 1
+                    return replica
+            self.primary_reads += 1
+            return None
+
+    def record_write(self, response: Response) -> None:
+        """
+        Stamp a successful write response with the time of the write.
+        """
+        if not self.replicas:
+            return
+        stamp = f"{time.time():.3f}"
+        response.set_cookie(
+            LAST_WRITE_COOKIE, stamp, max_age=math.ceil(self.sticky_seconds),
+            httponly=True, samesite="lax"
+        )
+        response.headers[LAST_WRITE_HEADER] = stamp
+
+    @staticmethod
+    def last_write(request: Request) -> Optional[float]:
+        stamp = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+        if not stamp:
+            return None
+        try:
+            return float(stamp)
+        except ValueError:
+            return None
+
+    def use_replica(self, request: Request) -> bool:
+        """
+        True if this request may read from a replica.
+        """
+        if not self.replicas or request.method not in SAFE_METHODS:
+            return False
+        last_write = self.last_write(request)
+        if last_write is not None and time.time() - last_write < self.sticky_seconds:
+            with self._lock:
+                self.sticky_reads += 1
+            return False
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "primary_fallback_reads": self.primary_reads,
+            "read_your_writes_reads": self.sticky_reads,
+            "replicas": [
+                {
+                    "url": replica.url,
+                    "healthy": replica.healthy,
+                    "reads": replica.reads,
+                    "failures": replica.failures,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a replica when ``replica`` is set.
+
+    Flushes, and any session holding pending changes, always use the primary.
+    A replica is picked once per session so a request reads a consistent view.
+    """
+    replica: Optional[Replica] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica is not None and not self._flushing and not (self.new or self.dirty or self.deleted):
+            return self.replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+class AsyncRoutingSession(RoutingSession):
+    """
+    Sync half of an AsyncSession; binds to the replica's async engine.
+    """
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica is not None and not self._flushing and not (self.new or self.dirty or self.deleted):
+            return self.replica.async_engine.sync_engine
+        return super(RoutingSession, self).get_bind(mapper=mapper, clause=clause, **kw)
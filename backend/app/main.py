@@ -1,13 +1,24 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from .database.database import engine, get_db
+from .database.database import engine, get_db, replica_router
+from .database.instrumentation import RequestStats, current_request_stats, sql_metrics
+from .database.routing import SAFE_METHODS
 from . import models
 from .routers import api_router
-from .core.security import get_password_hash
-
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+from .controllers.product_controller import ProductController
+from .controllers.refresh_token_controller import RefreshTokenController
+from .core.config import settings
+from .core.hashing import HashingPoolSaturated, password_pool
+from .core.idempotency import IdempotencyError, idempotency_store
+from .core.pagination import InvalidCursor
+from .core.revocation import revocation_list
+from .core.security import calibrate_bcrypt_rounds, get_password_hash_async
+from .search import autocomplete_index, product_search, supplier_search
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -26,8 +37,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-ms", "X-Next-Cursor", "Idempotent-Replayed", "ETag", "X-Cache", "X-Last-Write"],
 )
 
+# Pin clients that just wrote to the primary so they read their own writes
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        replica_router.record_write(response)
+    return response
+
+# Count the SQL each request issues and report it in headers and /api/metrics
+@app.middleware("http")
+async def sql_accounting(request: Request, call_next):
+    stats = RequestStats(request.method, request.scope)
+    token = current_request_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(token)
+    sql_metrics.observe_request(stats)
+    response.headers["X-DB-Query-Count"] = str(stats.query_count)
+    response.headers["X-DB-Time-ms"] = f"{stats.db_time_ms:.1f}"
+    return response
+
+# Shed login/registration bursts quickly instead of queueing them behind bcrypt
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_pool_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+# A cursor the client tampered with or truncated is a bad request, not a server error
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+# Idempotency-Key misuse, or a duplicate that outwaited the original request
+@app.exception_handler(IdempotencyError)
+async def idempotency_error_handler(request: Request, exc: IdempotencyError):
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after is not None else None
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=headers)
+
 # Include API routers
 app.include_router(api_router, prefix="/api")
 
@@ -45,16 +99,29 @@ async def root():
         "redoc": "/api/redoc"
     }
 
+# Pick a bcrypt cost that fits the configured latency budget on this hardware
+@app.on_event("startup")
+async def calibrate_password_hashing():
+    if settings.BCRYPT_TARGET_MS:
+        rounds = await password_pool.run(calibrate_bcrypt_rounds, settings.BCRYPT_TARGET_MS)
+        print(f"Calibrated bcrypt cost to {rounds} rounds for {settings.BCRYPT_TARGET_MS}ms target")
+
+# Use the database search indexes once migrations have created them
+@app.on_event("startup")
+def configure_search():
+    print(f"Product search backend: {product_search.configure(engine)}")
+    print(f"Supplier search backend: {supplier_search.configure(engine)}")
+
 # Create first admin user if not exists
 @app.on_event("startup")
-def create_first_admin():
+async def create_first_admin():
     db = next(get_db())
     try:
         admin = db.query(models.User).filter(models.User.email == "admin@example.com").first()
         if not admin:
             admin_user = models.User(
                 email="admin@example.com",
-                hashed_password=get_password_hash("admin123"),
+                hashed_password=await get_password_hash_async("admin123"),
                 full_name="Admin User",
                 role="admin",
                 is_active=True
@@ -67,6 +134,84 @@ def create_first_admin():
     finally:
         db.close()
 
+# Drop expired refresh tokens and revocations so both tables stay bounded
+@app.on_event("startup")
+def purge_expired_tokens():
+    db = next(get_db())
+    try:
+        deleted = RefreshTokenController().purge_expired(db)
+        if deleted:
+            print(f"Purged {deleted} expired refresh tokens")
+        deleted = revocation_list.purge_expired(db)
+        if deleted:
+            print(f"Purged {deleted} expired token revocations")
+        revocation_list.sync(db, force=True)
+    except Exception as e:
+        print(f"Error purging expired tokens: {e}")
+    finally:
+        db.close()
+
+# Drop Idempotency-Keys past their replay window
+@app.on_event("startup")
+def purge_expired_idempotency_keys():
+    db = next(get_db())
+    try:
+        deleted = idempotency_store.purge_expired(db)
+        if deleted:
+            print(f"Purged {deleted} expired idempotency keys")
+    except Exception as e:
+        print(f"Error purging expired idempotency keys: {e}")
+    finally:
+        db.close()
+
+# Keep stock_quantity of sharded products close to the sum of their shards
+def rollup_stock_shards():
+    db = next(get_db())
+    try:
+        ProductController().rollup_stock_shards(db)
+    finally:
+        db.close()
+
+async def rollup_stock_shards_forever():
+    while True:
+        await asyncio.sleep(settings.STOCK_SHARD_ROLLUP_SECONDS)
+        try:
+            await run_in_threadpool(rollup_stock_shards)
+        except Exception as e:
+            print(f"Error rolling up sharded stock: {e}")
+
+@app.on_event("startup")
+async def start_stock_shard_rollup():
+    app.state.stock_shard_rollup = asyncio.create_task(rollup_stock_shards_forever())
+
+@app.on_event("shutdown")
+async def stop_stock_shard_rollup():
+    app.state.stock_shard_rollup.cancel()
+
+# Reload autocomplete names and popularity; events keep names current in between
+def rebuild_autocomplete():
+    db = next(get_db())
+    try:
+        autocomplete_index.rebuild(db)
+    finally:
+        db.close()
+
+async def rebuild_autocomplete_forever():
+    while True:
+        try:
+            await run_in_threadpool(rebuild_autocomplete)
+        except Exception as e:
+            print(f"Error rebuilding autocomplete index: {e}")
+        await asyncio.sleep(settings.AUTOCOMPLETE_REFRESH_SECONDS)
+
+@app.on_event("startup")
+async def start_autocomplete_refresh():
+    app.state.autocomplete_refresh = asyncio.create_task(rebuild_autocomplete_forever())
+
+@app.on_event("shutdown")
+async def stop_autocomplete_refresh():
+    app.state.autocomplete_refresh.cancel()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
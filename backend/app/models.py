@@ -2,10 +2,7 @@ from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, St
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
-from passlib.context import CryptContext
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .core.security import get_password_hash, verify_password
 
 # Association table for many-to-many relationship between User and Product (for shopping cart/favorites)
 user_product_association = Table(
@@ -32,11 +29,11 @@ class User(Base):
     cart = relationship("Product", secondary=user_product_association, back_populates="in_cart")
 
     def verify_password(self, password: str) -> bool:
-        return pwd_context.verify(password, self.hashed_password)
+        return verify_password(password, self.hashed_password)
 
     @classmethod
     def get_password_hash(cls, password: str) -> str:
-        return pwd_context.hash(password)
+        return get_password_hash(password)
 
 
 class Product(Base):
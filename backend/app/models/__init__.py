@@ -1,12 +1,17 @@
 from .base import BaseModel
 from .user import User, UserRole
 from .product import Product, ProductCategory
-from .order import Order, OrderItem, OrderStatus
+from .product_stock_shard import ProductStockShard
+from .order import Order, OrderItem, OrderStatus, ORDER_STATUS_TRANSITIONS, allowed_previous_statuses
 from .supplier import Supplier
 from .link_request import LinkRequest
 from .conversation import Conversation
 from .message import Message
 from .team_member import TeamMember
+from .refresh_token import RefreshToken
+from .revoked_token import RevokedToken
+from .idempotency_key import IdempotencyKey
+from .catalog_version import CatalogVersion
 
 # This will be imported by alembic for migrations
 from app.database.database import Base
@@ -17,12 +22,19 @@ __all__ = [
     'UserRole',
     'Product',
     'ProductCategory',
+    'ProductStockShard',
     'Order',
     'OrderItem',
     'OrderStatus',
+    'ORDER_STATUS_TRANSITIONS',
+    'allowed_previous_statuses',
     'Supplier',
     'LinkRequest',
     'Conversation',
     'Message',
     'TeamMember',
+    'RefreshToken',
+    'RevokedToken',
+    'IdempotencyKey',
+    'CatalogVersion',
 ]
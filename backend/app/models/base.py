@@ -1,12 +1,18 @@
+from datetime import datetime, timezone
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy import Column, Integer, DateTime, func
 from ..database.database import Base
 
+def utcnow():
+    return datetime.now(timezone.utc)
+
 class BaseModel(Base):
     __abstract__ = True
     
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Also set client-side so every backend stores full microsecond precision,
+    # which keeps (created_at, id) keyset ordering exact
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
     
     @declared_attr
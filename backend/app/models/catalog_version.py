@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from .base import Base
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    # Catalog table, e.g. "products"; bumped with every catalog write to its
+    # rows, but not by stock level changes
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
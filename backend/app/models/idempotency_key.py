@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, UniqueConstraint
+from datetime import datetime
+from .base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("scope", "owner", "key", name="uq_idempotency_keys_scope_owner_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Route the key was used on, e.g. "POST /orders", and who used it
+    scope = Column(String(100), nullable=False)
+    owner = Column(String(64), nullable=False)
+    key = Column(String(255), nullable=False)
+    # sha256 of the request body; a key may only be replayed for the same request
+    request_hash = Column(String(64), nullable=False)
+    # "in_flight" while the first request runs, then "completed"
+    status = Column(String(20), nullable=False, default="in_flight")
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
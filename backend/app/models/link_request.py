@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -6,6 +6,10 @@ from .base import Base
 
 class LinkRequest(Base):
     __tablename__ = "link_requests"
+    __table_args__ = (
+        Index("ix_link_requests_user_id_status", "user_id", "status"),
+        Index("ix_link_requests_supplier_id_status", "supplier_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, Enum, DateTime, String, func
+from sqlalchemy import Column, Integer, Float, ForeignKey, Enum, DateTime, String, Index, func, inspect
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -10,8 +10,30 @@ class OrderStatus(str, enum.Enum):
     DELIVERED = "delivered"
     CANCELLED = "cancelled"
 
+# Statuses an order may move to from each status. Delivered orders are final;
+# cancelled ones can only be reopened as pending.
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: frozenset({OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.CANCELLED}),
+    OrderStatus.PROCESSING: frozenset({OrderStatus.SHIPPED, OrderStatus.CANCELLED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.DELIVERED}),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset({OrderStatus.PENDING}),
+}
+
+def allowed_previous_statuses(status: OrderStatus) -> frozenset:
+    """Statuses from which an order may move to ``status``"""
+    return frozenset(
+        previous for previous, targets in ORDER_STATUS_TRANSITIONS.items() if status in targets
+    )
+
 class Order(BaseModel):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_supplier_id_created_at_id", "supplier_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=True)
@@ -27,11 +49,29 @@ class Order(BaseModel):
 class OrderItem(BaseModel):
     __tablename__ = "order_items"
     
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
     
     # Relationships
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
+    
+    @property
+    def product_name(self):
+        """Product name if the product was eager-loaded with this item, else None."""
+        return self._loaded_product_attr("name")
+    
+    @property
+    def product_unit(self):
+        """Product unit if the product was eager-loaded with this item, else None."""
+        return self._loaded_product_attr("unit")
+    
+    def _loaded_product_attr(self, key):
+        # Never trigger a lazy load from serialization
+        if "product" in inspect(self).unloaded or self.product is None:
+            return None
+        if key in inspect(self.product).unloaded:
+            return None
+        return getattr(self.product, key)
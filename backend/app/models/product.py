@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, ForeignKey, Text, Enum
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -15,6 +15,15 @@ class ProductCategory(str, enum.Enum):
 
 class Product(BaseModel):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_products_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_products_supplier_id_created_at_id", "supplier_id", "created_at", "id"),
+        # Sort keysets for catalog browsing
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+    )
     
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
@@ -22,6 +31,9 @@ class Product(BaseModel):
     unit = Column(String(20), default="kg", nullable=False)
     category = Column(Enum(ProductCategory), nullable=False)
     stock_quantity = Column(Integer, default=0, nullable=False)
+    # Number of stock shards; when non-zero the shards hold the authoritative
+    # stock and stock_quantity is their periodically rolled-up total
+    stock_shards = Column(Integer, default=0, server_default="0", nullable=False)
     image_url = Column(String(255), nullable=True)
     
     # Relationships
@@ -30,3 +42,4 @@ class Product(BaseModel):
     owner = relationship("User", back_populates="products")
     supplier = relationship("Supplier", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product")
+    stock_counters = relationship("ProductStockShard", back_populates="product", cascade="all, delete-orphan")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+from .base import Base
+
+
+class ProductStockShard(Base):
+    """
+    One slice of a hot product's stock. Orders decrement a single slice, so
+    concurrent buyers of the same product update different rows.
+    """
+    __tablename__ = "product_stock_shards"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+
+    # Relationships
+    product = relationship("Product", back_populates="stock_counters")
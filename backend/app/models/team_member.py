@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -6,6 +6,10 @@ from .base import Base
 
 class TeamMember(Base):
     __tablename__ = "team_members"
+    __table_args__ = (
+        Index("ix_team_members_supplier_id_user_id", "supplier_id", "user_id"),
+        Index("ix_team_members_supplier_id_created_at_id", "supplier_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from . import users, products, auth, orders, suppliers, messages, team, dashboard
+from . import users, products, auth, orders, suppliers, messages, team, dashboard, metrics, autocomplete
 
 api_router = APIRouter()
 
@@ -12,5 +12,7 @@ api_router.include_router(suppliers.router)
 api_router.include_router(messages.router)
 api_router.include_router(team.router)
 api_router.include_router(dashboard.router)
+api_router.include_router(metrics.router)
+api_router.include_router(autocomplete.router)
 
 __all__ = ["api_router"]
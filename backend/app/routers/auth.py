@@ -1,53 +1,61 @@
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
+import math
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..database.database import get_db
+from .base import oauth2_scheme
 from ..core.config import settings
-from ..core.security import get_password_hash, verify_password
+from ..core.hashing import HashingPoolSaturated
+from ..core.principal import load_principal
+from ..controllers.user_controller import authenticate_user
+from ..controllers.refresh_token_controller import (
+    RefreshTokenController,
+    RefreshTokenError,
+    RefreshTokenReuseError,
+)
+from ..core.revocation import revocation_list
+from ..core.throttle import login_throttle
+from ..core.security import (
+    create_access_token,
+    get_password_hash_blocking,
+    verify_token,
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["auth"])
-
-def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user:
-        return None
-    if not verify_password(password, user.hashed_password):
-        return None
-    return user
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.SECRET_KEY, 
-        algorithm=settings.ALGORITHM
-    )
-    return encoded_jwt
+refresh_token_controller = RefreshTokenController()
 
 @router.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = authenticate_user(
+    # Reject brute-force bursts before paying for a bcrypt check
+    client_ip = request.client.host if request.client else None
+    retry_after = await run_in_threadpool(login_throttle.check, form_data.username, client_ip)
+    if retry_after is not None:
+        logger.warning(f"Login throttled: email={form_data.username}, ip={client_ip}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    
+    user = await authenticate_user(
         db, 
         email=form_data.username, 
         password=form_data.password
@@ -59,6 +67,8 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    await run_in_threadpool(login_throttle.reset, form_data.username, client_ip)
+    
     # Check if user is active
     if not user.is_active:
         raise HTTPException(
@@ -72,10 +82,13 @@ async def login_for_access_token(
         data={"sub": str(user.id)}, 
         expires_delta=access_token_expires
     )
+    refresh_token = refresh_token_controller.issue(db, user_id=user.id)
+    db.commit()
     
     return {
         "access_token": access_token, 
         "token_type": "bearer",
+        "refresh_token": refresh_token,
         "user": {
             "id": user.id,
             "email": user.email,
@@ -85,6 +98,78 @@ async def login_for_access_token(
         }
     }
 
+@router.post("/token/refresh", response_model=schemas.Token)
+def refresh_access_token(
+    body: schemas.TokenRefresh,
+    db: Session = Depends(get_db)
+):
+    """
+    Exchange a refresh token for a new access token and a rotated refresh token
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        user_id, refresh_token = refresh_token_controller.rotate(db, token=body.refresh_token)
+    except RefreshTokenReuseError:
+        logger.warning("Refresh token reuse detected, token family revoked")
+        raise credentials_exception
+    except RefreshTokenError:
+        raise credentials_exception
+    
+    user = load_principal(db, user_id)
+    if not user or not user.is_active:
+        raise credentials_exception
+    
+    access_token = create_access_token(
+        data={"sub": str(user.id)},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    body: Optional[schemas.TokenRefresh] = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """
+    Revoke the presented access token and, if given, its refresh token family
+    """
+    try:
+        payload = verify_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if payload.get("jti"):
+        revocation_list.revoke_token(
+            db,
+            jti=payload["jti"],
+            user_id=int(payload["sub"]),
+            expires_at=datetime.utcfromtimestamp(payload["exp"]),
+        )
+    
+    if body and body.refresh_token:
+        db_token = (
+            db.query(models.RefreshToken)
+            .filter(models.RefreshToken.token_hash == refresh_token_controller.hash_token(body.refresh_token))
+            .first()
+        )
+        if db_token and db_token.user_id == int(payload["sub"]):
+            refresh_token_controller.revoke_family(db, family_id=db_token.family_id)
+            db.commit()
+    return None
+
 @router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
 def register_user(
     user: schemas.UserCreate,
@@ -107,7 +192,7 @@ def register_user(
         
         # Hash the password
         logger.debug(f"Hashing password for {user.email}")
-        hashed_password = get_password_hash(user.password)
+        hashed_password = get_password_hash_blocking(user.password)
         
         # Determine role - use provided role or default to consumer
         role = user.role if user.role else models.UserRole.CONSUMER
@@ -135,7 +220,7 @@ def register_user(
         logger.info(f"User registered successfully: id={db_user.id}, email={user.email}")
         return db_user
         
-    except HTTPException:
+    except (HTTPException, HashingPoolSaturated):
         raise
     except Exception as e:
         logger.error(f"Error during registration: {str(e)}", exc_info=True)
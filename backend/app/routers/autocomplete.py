@@ -0,0 +1,22 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Query
+
+from .. import schemas
+from ..search import autocomplete_index
+from ..search.autocomplete import MAX_SUGGESTIONS
+
+router = APIRouter(prefix="/autocomplete", tags=["autocomplete"])
+
+
+@router.get("", response_model=List[schemas.Suggestion])
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    kind: Optional[Literal["product", "supplier"]] = None
+):
+    """
+    Product and supplier names completing ``q``, most ordered first. Served
+    from memory; safe to call on every keystroke.
+    """
+    return autocomplete_index.suggest(q, limit=limit, kind=kind)
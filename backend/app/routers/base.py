@@ -1,47 +1,49 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from typing import Optional
+from jose import JWTError
+from typing import List, Optional
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
+from app.core.pagination import Keyset
+from app.core.principal import Principal, load_principal
+from app.core.revocation import revocation_list
+from app.core.security import verify_token
 from app.database.database import get_db
-from app.models import User
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Dependency to get current user from token
-async def get_current_user(
+# Dependency to get current user from token. A plain def, so FastAPI runs its
+# Session queries (revocation checks, principal loads) in the threadpool
+def get_current_user(
     db: Session = Depends(get_db), 
     token: str = Depends(oauth2_scheme)
-) -> User:
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = verify_token(token)
         user_id: int = int(payload.get("sub"))
         if user_id is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    if revocation_list.is_revoked(db, payload):
+        raise credentials_exception
+    
+    user = load_principal(db, user_id)
     if user is None:
         raise credentials_exception
     return user
 
 # Dependency to check if user is admin
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -55,8 +57,22 @@ class CommonQueryParams:
         self,
         skip: int = 0,
         limit: int = 100,
-        q: Optional[str] = None
+        q: Optional[str] = None,
+        cursor: Optional[str] = None
     ):
         self.skip = skip
         self.limit = limit
         self.q = q
+        self.cursor = cursor
+
+# Response header carrying the cursor for the next page of a list endpoint
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def set_next_cursor(response: Response, keyset: Keyset, items: List, limit: int) -> List:
+    """
+    Advertise the next page's cursor when this page is full, and return ``items``.
+    """
+    cursor = keyset.next_cursor(items, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return items
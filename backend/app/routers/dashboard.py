@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from .. import models
-from ..database.database import get_db
+from ..database.database import get_read_db
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 @router.get("/consumer/{user_id}", response_model=Dict[str, Any])
 def get_consumer_dashboard(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get consumer dashboard with summary statistics and recent orders.
@@ -111,7 +111,7 @@ def get_consumer_dashboard(
 @router.get("/supplier/{user_id}", response_model=Dict[str, Any])
 def get_supplier_dashboard(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get supplier dashboard with sales metrics and inventory status.
@@ -156,7 +156,7 @@ def get_supplier_dashboard(
         
         low_stock_products = db.query(func.count(models.Product.id)).filter(
             (models.Product.supplier_id == supplier.id) &
-            (models.Product.stock < 10)
+            (models.Product.stock_quantity < 10)
         ).scalar() or 0
         
         # Get recent orders
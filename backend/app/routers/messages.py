@@ -1,33 +1,52 @@
 import logging
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..database.database import get_db
+from ..core.idempotency import IDEMPOTENCY_HEADER, idempotency_store
+from ..core.pagination import InvalidCursor, Keyset
+from ..database.database import get_async_db, get_db, get_read_db
+from .base import set_next_cursor
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/messages", tags=["messages"])
+conversation_keyset = Keyset(models.Conversation.created_at, models.Conversation.id)
+# Threads read oldest first
+message_keyset = Keyset(models.Message.created_at, models.Message.id, descending=False)
+# Thread history pages backwards from the newest message
+history_keyset = Keyset(models.Message.created_at, models.Message.id)
 
 
 @router.get("/conversations", response_model=List[schemas.Conversation])
-def list_conversations(
+async def list_conversations(
     user_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all conversations for a user.
     """
     try:
-        conversations = db.query(models.Conversation).filter(
-            (models.Conversation.user1_id == user_id) |
-            (models.Conversation.user2_id == user_id)
-        ).offset(skip).limit(limit).all()
+        result = await db.execute(
+            conversation_keyset.paginate(
+                select(models.Conversation).where(
+                    (models.Conversation.user1_id == user_id) |
+                    (models.Conversation.user2_id == user_id)
+                ),
+                skip=skip, limit=limit, cursor=cursor
+            )
+        )
         
-        return conversations
+        return set_next_cursor(response, conversation_keyset, result.scalars().all(), limit)
+    except InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Error fetching conversations: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -37,17 +56,19 @@ def list_conversations(
 
 
 @router.get("/conversations/{conversation_id}", response_model=schemas.ConversationDetail)
-def get_conversation(
+async def get_conversation(
     conversation_id: int,
-    db: Session = Depends(get_db)
+    message_limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific conversation with all messages.
+    Get a specific conversation with its newest messages.
+    
+    Pass the returned older_cursor as ``before`` to load the preceding page.
     """
     try:
-        conversation = db.query(models.Conversation).filter(
-            models.Conversation.id == conversation_id
-        ).first()
+        conversation = await db.get(models.Conversation, conversation_id)
         
         if not conversation:
             raise HTTPException(
@@ -55,8 +76,22 @@ def get_conversation(
                 detail="Conversation not found"
             )
         
-        return conversation
-    except HTTPException:
+        result = await db.execute(
+            history_keyset.paginate(
+                select(models.Message).where(
+                    models.Message.conversation_id == conversation_id
+                ),
+                limit=message_limit, cursor=before
+            )
+        )
+        messages = result.scalars().all()
+        
+        return schemas.ConversationDetail(
+            **schemas.Conversation.model_validate(conversation).model_dump(),
+            messages=[schemas.Message.model_validate(message) for message in reversed(messages)],
+            older_cursor=history_keyset.next_cursor(messages, message_limit),
+        )
+    except (HTTPException, InvalidCursor):
         raise
     except Exception as e:
         logger.error(f"Error fetching conversation: {str(e)}", exc_info=True)
@@ -67,20 +102,20 @@ def get_conversation(
 
 
 @router.get("/conversations/{conversation_id}/messages", response_model=List[schemas.Message])
-def get_conversation_messages(
+async def get_conversation_messages(
     conversation_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all messages in a conversation.
     """
     try:
         # Verify conversation exists
-        conversation = db.query(models.Conversation).filter(
-            models.Conversation.id == conversation_id
-        ).first()
+        conversation = await db.get(models.Conversation, conversation_id)
         
         if not conversation:
             raise HTTPException(
@@ -88,12 +123,17 @@ def get_conversation_messages(
                 detail="Conversation not found"
             )
         
-        messages = db.query(models.Message).filter(
-            models.Message.conversation_id == conversation_id
-        ).offset(skip).limit(limit).all()
+        result = await db.execute(
+            message_keyset.paginate(
+                select(models.Message).where(
+                    models.Message.conversation_id == conversation_id
+                ),
+                skip=skip, limit=limit, cursor=cursor
+            )
+        )
         
-        return messages
-    except HTTPException:
+        return set_next_cursor(response, message_keyset, result.scalars().all(), limit)
+    except (HTTPException, InvalidCursor):
         raise
     except Exception as e:
         logger.error(f"Error fetching messages: {str(e)}", exc_info=True)
@@ -147,11 +187,25 @@ def create_conversation(
 @router.post("/", response_model=schemas.Message)
 def send_message(
     message: schemas.MessageCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
     db: Session = Depends(get_db)
 ):
     """
-    Send a message in a conversation.
+    Send a message in a conversation. Retries sent with the same
+    Idempotency-Key return the original message instead of posting it twice.
     """
+    return idempotency_store.run(
+        db,
+        key=idempotency_key,
+        scope="POST /messages",
+        owner=f"user:{message.sender_id}",
+        payload=message,
+        handler=lambda: _create_message(db, message),
+        response_model=schemas.Message,
+    )
+
+
+def _create_message(db: Session, message: schemas.MessageCreate) -> models.Message:
     try:
         # Verify conversation exists
         conversation = db.query(models.Conversation).filter(
@@ -192,7 +246,7 @@ def send_message(
 @router.get("/{message_id}", response_model=schemas.Message)
 def get_message(
     message_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a specific message.
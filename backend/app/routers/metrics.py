@@ -0,0 +1,47 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from ..core.catalog_cache import catalog_cache
+from ..core.events import event_bus
+from ..core.hashing import password_pool
+from ..core.idempotency import idempotency_store
+from ..core.principal import Principal, principal_cache
+from ..core.revocation import revocation_list
+from ..core.security import token_cache_metrics
+from ..core.throttle import login_throttle
+from ..database.database import async_engine, engine, replica_router
+from ..database.instrumentation import sql_metrics
+from ..database.nplusone import nplusone_detector
+from ..database.pool import pool_status
+from ..search import autocomplete_index, product_facets, supplier_search
+from .base import get_current_admin_user
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/", response_model=Dict[str, Any])
+def get_metrics(
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """
+    Process-local runtime metrics (admin only).
+    """
+    return {
+        "password_hashing": password_pool.metrics(),
+        "principal_cache": principal_cache.metrics(),
+        "token_cache": token_cache_metrics(),
+        "revocation": revocation_list.metrics(),
+        "login_throttle": login_throttle.metrics(),
+        "db_pool": pool_status(engine),
+        "async_db_pool": pool_status(async_engine.sync_engine),
+        "read_replicas": replica_router.metrics(),
+        "sql": sql_metrics.metrics(),
+        "nplusone": nplusone_detector.metrics(),
+        "idempotency": idempotency_store.metrics(),
+        "events": event_bus.metrics(),
+        "supplier_search": supplier_search.metrics(),
+        "autocomplete": autocomplete_index.metrics(),
+        "product_facets": product_facets.metrics(),
+        "catalog_cache": catalog_cache.metrics(),
+    }
@@ -1,47 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from .. import models, schemas
-from ..database.database import get_db
-from ..controllers.order_controller import OrderController
-from .base import get_current_user, CommonQueryParams
+from ..database.database import get_async_db, get_db
+from ..controllers.order_controller import (
+    UPDATED, InvalidStatusTransition, OrderController, OrderStatusConflict
+)
+from ..controllers.product_controller import InsufficientStock
+from ..core.idempotency import IDEMPOTENCY_HEADER, idempotency_store
+from ..core.principal import Principal
+from .base import get_current_user, set_next_cursor, CommonQueryParams
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 order_controller = OrderController()
 
 @router.get("/", response_model=List[schemas.Order])
-def list_orders(
+async def list_orders(
+    response: Response,
     commons: CommonQueryParams = Depends(),
     status: Optional[models.OrderStatus] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    include_products: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
-    List all orders. Filterable by status.
+    List all orders. Filterable by status. Set include_products to add each
+    item's product name and unit.
     """
     if current_user.role == "admin":
         if status:
-            return order_controller.get_multi_by_status(
-                db, status=status, skip=commons.skip, limit=commons.limit
+            orders = await order_controller.get_multi_by_status_async(
+                db, status=status, skip=commons.skip, limit=commons.limit,
+                cursor=commons.cursor, include_products=include_products
+            )
+        else:
+            orders = await order_controller.get_multi_async(
+                db, skip=commons.skip, limit=commons.limit,
+                cursor=commons.cursor, include_products=include_products
             )
-        return order_controller.get_multi(
-            db, skip=commons.skip, limit=commons.limit
-        )
     else:
         # Regular users can only see their own orders
-        return order_controller.get_multi_by_user(
-            db, user_id=current_user.id, skip=commons.skip, limit=commons.limit
+        orders = await order_controller.get_multi_by_user_async(
+            db, user_id=current_user.id, skip=commons.skip, limit=commons.limit,
+            cursor=commons.cursor, include_products=include_products
         )
+    return set_next_cursor(response, order_controller.keyset, orders, commons.limit)
 
 @router.post("/", response_model=schemas.Order, status_code=status.HTTP_201_CREATED)
 def create_order(
     order: schemas.OrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
-    Create a new order.
+    Create a new order. Retries sent with the same Idempotency-Key get the
+    original order back instead of placing another one.
     """
     # Only consumers can create orders
     if current_user.role != "consumer":
@@ -50,20 +66,41 @@ def create_order(
             detail="Only consumers can create orders"
         )
     
-    return order_controller.create_with_items(
-        db, obj_in=order, user_id=current_user.id
-    )
+    try:
+        return idempotency_store.run(
+            db,
+            key=idempotency_key,
+            scope="POST /orders",
+            owner=f"user:{current_user.id}",
+            payload=order,
+            handler=lambda: order_controller.create_with_items(
+                db, obj_in=order, user_id=current_user.id
+            ),
+            status_code=status.HTTP_201_CREATED,
+            response_model=schemas.Order,
+        )
+    except InsufficientStock as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 @router.get("/{order_id}", response_model=schemas.Order)
 def get_order(
     order_id: int,
+    include_products: bool = False,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get a specific order by ID.
     """
-    order = order_controller.get(db, id=order_id)
+    order = order_controller.get_with_items(db, order_id, include_products=include_products)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -79,12 +116,38 @@ def get_order(
     
     return order
 
+@router.put("/status", response_model=schemas.OrderStatusBulkResult)
+def bulk_update_order_status(
+    update: schemas.OrderStatusBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Move many orders to one status (admin or supplier only). Orders that
+    cannot make the transition are reported in the results rather than
+    failing the batch.
+    """
+    if current_user.role not in ["admin", "supplier"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to update orders"
+        )
+    
+    results = order_controller.bulk_update_status(
+        db, order_ids=update.order_ids, status=update.status
+    )
+    return {
+        "status": update.status,
+        "updated": sum(result["outcome"] == UPDATED for result in results),
+        "results": results,
+    }
+
 @router.put("/{order_id}/status", response_model=schemas.Order)
 def update_order_status(
     order_id: int,
-    status: models.OrderStatus,
+    new_status: models.OrderStatus = Query(..., alias="status"),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Update order status (admin or supplier only).
@@ -103,16 +166,24 @@ def update_order_status(
             detail="Not enough permissions to update this order"
         )
     
-    return order_controller.update_status(
-        db, db_obj=order, status=status
-    )
+    try:
+        return order_controller.update_status(
+            db, db_obj=order, status=new_status
+        )
+    except (InsufficientStock, InvalidStatusTransition, OrderStatusConflict) as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
 
 @router.get("/user/{user_id}", response_model=List[schemas.Order])
 def get_orders_by_user(
     user_id: int,
+    response: Response,
     commons: CommonQueryParams = Depends(),
+    include_products: bool = False,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get orders for a specific user (admin only).
@@ -123,6 +194,8 @@ def get_orders_by_user(
             detail="Only admins can view orders by user"
         )
     
-    return order_controller.get_multi_by_user(
-        db, user_id=user_id, skip=commons.skip, limit=commons.limit
+    orders = order_controller.get_multi_by_user(
+        db, user_id=user_id, skip=commons.skip, limit=commons.limit,
+        cursor=commons.cursor, include_products=include_products
     )
+    return set_next_cursor(response, order_controller.keyset, orders, commons.limit)
@@ -1,42 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from .. import models, schemas
-from ..database.database import get_db
-from ..controllers.product_controller import ProductController
-from .base import get_current_user, CommonQueryParams
+from ..database.database import get_async_db, get_db
+from ..controllers.product_controller import SORT_KEYSETS, ProductController, ProductSort
+from ..core.catalog_cache import catalog_cache
+from ..core.principal import Principal
+from ..search import ProductFilters, product_facets, product_search
+from .base import NEXT_CURSOR_HEADER, get_current_user, get_current_admin_user, CommonQueryParams
 
 router = APIRouter(prefix="/products", tags=["products"])
 product_controller = ProductController()
 
+def product_filters(
+    category: Optional[models.ProductCategory] = None,
+    supplier_id: Optional[int] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: Optional[bool] = None,
+    unit: Optional[str] = Query(None, max_length=20)
+) -> ProductFilters:
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_price cannot exceed max_price"
+        )
+    return ProductFilters(
+        category=category, supplier_id=supplier_id, min_price=min_price,
+        max_price=max_price, in_stock=in_stock, unit=unit
+    )
+
 @router.get("/", response_model=List[schemas.Product])
-def list_products(
+async def list_products(
+    request: Request,
     commons: CommonQueryParams = Depends(),
-    db: Session = Depends(get_db),
-    category: Optional[models.ProductCategory] = None
+    filters: ProductFilters = Depends(product_filters),
+    sort: ProductSort = ProductSort.NEWEST,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrieve products with optional filtering by category and search query.
+    Retrieve products matching every given filter, in ``sort`` order.
+    Search results are ordered by relevance instead. Pages are served from
+    the catalog cache when possible.
     """
+    key = catalog_cache.product_list_key(request)
+    await catalog_cache.sync_async(db)
+    cached = catalog_cache.respond(request, key)
+    if cached is not None:
+        return cached
+    version = catalog_cache.version_for(key)
     if commons.q:
-        return product_controller.search(
-            db, query=commons.q, skip=commons.skip, limit=commons.limit
-        )
-    elif category:
-        return product_controller.get_multi_by_category(
-            db, category=category, skip=commons.skip, limit=commons.limit
+        products = await product_controller.search_async(
+            db, query=commons.q, filters=filters,
+            skip=commons.skip, limit=commons.limit, cursor=commons.cursor
         )
+        keyset = product_search.keyset
     else:
-        return product_controller.get_multi(
-            db, skip=commons.skip, limit=commons.limit
+        products = await product_controller.browse_async(
+            db, filters=filters, sort=sort, skip=commons.skip, limit=commons.limit, cursor=commons.cursor
         )
+        keyset = SORT_KEYSETS[sort]
+    next_cursor = keyset.next_cursor(products, commons.limit)
+    return catalog_cache.fill(
+        request, key, [schemas.Product.model_validate(product) for product in products],
+        version=version, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
+
+@router.get("/facets", response_model=schemas.ProductFacetCounts)
+async def product_facet_counts(
+    filters: ProductFilters = Depends(product_filters),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Category, supplier, unit, price range and stock counts for the products
+    matching the filters, served from the in-process facet index.
+    """
+    await product_facets.refresh_async(db)
+    return product_facets.counts(filters)
 
 @router.post("/", response_model=schemas.Product, status_code=status.HTTP_201_CREATED)
 def create_product(
     product: schemas.ProductCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create a new product (requires authentication).
@@ -55,27 +103,34 @@ def create_product(
     return product_controller.create(db, obj_in=product_dict)
 
 @router.get("/{product_id}", response_model=schemas.Product)
-def read_product(
+async def read_product(
     product_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific product by ID.
+    Get a specific product by ID, from the catalog cache when possible.
     """
-    product = product_controller.get(db, id=product_id)
+    key = catalog_cache.product_key(product_id)
+    await catalog_cache.sync_async(db)
+    cached = catalog_cache.respond(request, key)
+    if cached is not None:
+        return cached
+    version = catalog_cache.version_for(key)
+    product = await product_controller.get_async(db, id=product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
-    return product
+    return catalog_cache.fill(request, key, schemas.Product.model_validate(product), version=version)
 
 @router.put("/{product_id}", response_model=schemas.Product)
 def update_product(
     product_id: int,
     product_in: schemas.ProductUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Update a product (requires ownership or admin privileges).
@@ -98,11 +153,30 @@ def update_product(
         db, db_obj=product, obj_in=product_in
     )
 
+@router.put("/{product_id}/stock-shards", response_model=schemas.Product)
+def configure_stock_shards(
+    product_id: int,
+    shards: int = Query(..., ge=0, le=64),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """
+    Split a hot product's stock over several counters so concurrent orders
+    do not queue on one row (admin only). 0 turns sharding off.
+    """
+    product = product_controller.get(db, id=product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    return product_controller.configure_stock_shards(db, db_obj=product, shards=shards)
+
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Delete a product (requires ownership or admin privileges).
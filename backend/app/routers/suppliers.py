@@ -1,66 +1,98 @@
 import logging
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..database.database import get_db
+from ..core.catalog_cache import catalog_cache
+from ..core.idempotency import IDEMPOTENCY_HEADER, idempotency_store
+from ..core.pagination import Keyset
+from ..search import supplier_search
+from ..database.database import get_async_db, get_db, get_read_db
+from .base import set_next_cursor
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/suppliers", tags=["suppliers"])
+supplier_keyset = Keyset(models.Supplier.created_at, models.Supplier.id)
 
 
 @router.get("", response_model=List[schemas.Supplier])
-def list_suppliers(
+async def list_suppliers(
+    response: Response,
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all suppliers with optional filtering by category or search term.
+    Search is typo-tolerant and ranks by match quality, rating, verification
+    and review count.
     """
-    query = db.query(models.Supplier)
-    
     if search:
-        query = query.filter(
-            (models.Supplier.name.ilike(f"%{search}%")) |
-            (models.Supplier.description.ilike(f"%{search}%"))
+        suppliers = await supplier_search.search_async(
+            db, query=search, category=category, skip=skip, limit=limit, cursor=cursor
         )
+        return set_next_cursor(response, supplier_search.keyset, suppliers, limit)
     
+    query = select(models.Supplier)
     if category:
-        query = query.filter(models.Supplier.category.ilike(f"%{category}%"))
+        query = query.where(models.Supplier.category.ilike(f"%{category}%"))
     
-    suppliers = query.offset(skip).limit(limit).all()
-    return suppliers
+    result = await db.execute(
+        supplier_keyset.paginate(query, skip=skip, limit=limit, cursor=cursor)
+    )
+    return set_next_cursor(response, supplier_keyset, result.scalars().all(), limit)
 
 
 @router.get("/{supplier_id}", response_model=schemas.Supplier)
 def get_supplier(
     supplier_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get a specific supplier by ID.
+    Get a specific supplier by ID, from the catalog cache when possible.
     """
+    key = catalog_cache.supplier_key(supplier_id)
+    cached = catalog_cache.respond(request, key)
+    if cached is not None:
+        return cached
+    version = catalog_cache.version_for(key)
     supplier = db.query(models.Supplier).filter(models.Supplier.id == supplier_id).first()
     if not supplier:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Supplier not found"
         )
-    return supplier
+    return catalog_cache.fill(request, key, schemas.Supplier.model_validate(supplier), version=version)
 
 
 @router.post("/link-request", response_model=dict)
 def send_link_request(
     request: schemas.LinkRequest,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
     db: Session = Depends(get_db)
 ):
     """
-    Send a link request to a supplier.
+    Send a link request to a supplier. Retries sent with the same
+    Idempotency-Key return the original response.
     """
+    return idempotency_store.run(
+        db,
+        key=idempotency_key,
+        scope="POST /suppliers/link-request",
+        owner=f"user:{request.user_id}",
+        payload=request,
+        handler=lambda: _create_link_request(db, request),
+    )
+
+
+def _create_link_request(db: Session, request: schemas.LinkRequest) -> dict:
     try:
         # Check if supplier exists
         supplier = db.query(models.Supplier).filter(models.Supplier.id == request.supplier_id).first()
@@ -117,7 +149,7 @@ def send_link_request(
 def get_user_link_requests(
     user_id: int,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all link requests for a user.
@@ -135,7 +167,7 @@ def get_user_link_requests(
 def get_supplier_link_requests(
     supplier_id: int,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all link requests for a supplier.
@@ -1,31 +1,44 @@
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..database.database import get_db
+from ..core.pagination import InvalidCursor, Keyset
+from ..database.database import get_db, get_read_db
+from .base import set_next_cursor
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/team", tags=["team"])
+member_keyset = Keyset(models.TeamMember.created_at, models.TeamMember.id)
 
 
 @router.get("/members", response_model=List[schemas.TeamMember])
 def list_team_members(
     supplier_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all team members for a supplier.
     """
     try:
-        members = db.query(models.TeamMember).filter(
-            models.TeamMember.supplier_id == supplier_id
-        ).offset(skip).limit(limit).all()
+        members = db.execute(
+            member_keyset.paginate(
+                select(models.TeamMember).where(
+                    models.TeamMember.supplier_id == supplier_id
+                ),
+                skip=skip, limit=limit, cursor=cursor
+            )
+        ).scalars().all()
         
-        return members
+        return set_next_cursor(response, member_keyset, members, limit)
+    except InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Error fetching team members: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -37,7 +50,7 @@ def list_team_members(
 @router.get("/members/{member_id}", response_model=schemas.TeamMember)
 def get_team_member(
     member_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a specific team member.
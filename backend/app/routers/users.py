@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
 from .. import models, schemas
 from ..database.database import get_db
+from ..core.revocation import revocation_list
+from ..core.security import get_password_hash_blocking
+from ..controllers.refresh_token_controller import RefreshTokenController
 from ..controllers.user_controller import UserController
-from .base import get_current_user, get_current_admin_user, CommonQueryParams
+from ..core.principal import Principal
+from .base import get_current_user, get_current_admin_user, set_next_cursor, CommonQueryParams
 
 router = APIRouter(prefix="/users", tags=["users"])
 user_controller = UserController()
+refresh_token_controller = RefreshTokenController()
 
 @router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
 def create_user(
@@ -27,52 +32,57 @@ def create_user(
         )
     
     # Default role is 'consumer' for new users
-    user_dict = user.dict()
-    user_dict["role"] = "consumer"
+    user_in = user.model_copy(update={"role": models.UserRole.CONSUMER})
+    hashed_password = get_password_hash_blocking(user.password)
     
-    return user_controller.create(db, obj_in=user_dict)
+    return user_controller.create(db, obj_in=user_in, hashed_password=hashed_password)
 
 @router.get("/me", response_model=schemas.User)
 def read_user_me(
-    current_user: models.User = Depends(get_current_user)
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get current user details.
     """
-    return current_user
+    return user_controller.get(db, id=current_user.id)
 
 @router.put("/me", response_model=schemas.User)
 def update_user_me(
     user_in: schemas.UserUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Update current user details.
     """
+    user = user_controller.get(db, id=current_user.id)
+    # Users cannot (de)activate themselves
     return user_controller.update(
-        db, db_obj=current_user, obj_in=user_in
+        db, db_obj=user, obj_in=user_in.dict(exclude_unset=True, exclude={"is_active"})
     )
 
 # Admin-only endpoints
 @router.get("/", response_model=List[schemas.User])
 def list_users(
+    response: Response,
     commons: CommonQueryParams = Depends(),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_admin_user)
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Retrieve all users (admin only).
     """
-    return user_controller.get_multi(
-        db, skip=commons.skip, limit=commons.limit
+    users = user_controller.get_multi(
+        db, skip=commons.skip, limit=commons.limit, cursor=commons.cursor
     )
+    return set_next_cursor(response, user_controller.keyset, users, commons.limit)
 
 @router.get("/{user_id}", response_model=schemas.User)
 def read_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_admin_user)
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Get a specific user by ID (admin only).
@@ -90,7 +100,7 @@ def update_user(
     user_id: int,
     user_in: schemas.UserUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_admin_user)
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Update a user (admin only).
@@ -101,13 +111,20 @@ def update_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return user_controller.update(db, db_obj=user, obj_in=user_in)
+    user = user_controller.update(db, db_obj=user, obj_in=user_in)
+    
+    # Disabling a user invalidates every session it already holds
+    if user_in.is_active is False:
+        revocation_list.revoke_user(db, user_id=user_id)
+        refresh_token_controller.revoke_for_user(db, user_id=user_id)
+        db.commit()
+    return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_admin_user)
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Delete a user (admin only).
@@ -118,5 +135,7 @@ def delete_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    # Revoke first, so no token of the user is accepted once it is gone
+    revocation_list.revoke_user(db, user_id=user_id)
     user_controller.remove(db, id=user_id)
     return None
@@ -1,15 +1,18 @@
-from .user import User, UserCreate, UserInDB, UserUpdate, Token
+from .user import User, UserCreate, UserInDB, UserUpdate, Token, TokenRefresh
 from .product import Product, ProductCreate, ProductInDB, ProductUpdate
-from .order import Order, OrderCreate, OrderInDB, OrderUpdate, OrderItem, OrderItemCreate
+from .order import Order, OrderCreate, OrderInDB, OrderUpdate, OrderItem, OrderItemCreate, OrderStatusBulkUpdate, OrderStatusOutcome, OrderStatusBulkResult
 from .supplier import Supplier, SupplierCreate, SupplierUpdate, LinkRequest, LinkRequestCreate, LinkRequestUpdate, LinkRequestResponse
 from .message import Message, MessageCreate, Conversation, ConversationCreate, ConversationDetail
 from .team import TeamMember, TeamMemberCreate, TeamMemberUpdate
+from .search import Suggestion, FacetCount, PriceRangeCount, ProductFacetCounts
 
 __all__ = [
-    'User', 'UserCreate', 'UserInDB', 'UserUpdate', 'Token',
+    'User', 'UserCreate', 'UserInDB', 'UserUpdate', 'Token', 'TokenRefresh',
     'Product', 'ProductCreate', 'ProductInDB', 'ProductUpdate',
     'Order', 'OrderCreate', 'OrderInDB', 'OrderUpdate', 'OrderItem', 'OrderItemCreate',
+    'OrderStatusBulkUpdate', 'OrderStatusOutcome', 'OrderStatusBulkResult',
     'Supplier', 'SupplierCreate', 'SupplierUpdate', 'LinkRequest', 'LinkRequestCreate', 'LinkRequestUpdate', 'LinkRequestResponse',
     'Message', 'MessageCreate', 'Conversation', 'ConversationCreate', 'ConversationDetail',
-    'TeamMember', 'TeamMemberCreate', 'TeamMemberUpdate'
+    'TeamMember', 'TeamMemberCreate', 'TeamMemberUpdate',
+    'Suggestion', 'FacetCount', 'PriceRangeCount', 'ProductFacetCounts'
 ]
@@ -44,7 +44,9 @@ class Conversation(ConversationBase):
 
 
 class ConversationDetail(Conversation):
+    # Newest page of the thread, oldest first; older_cursor fetches the page before it
     messages: List[Message] = []
+    older_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from ..models.order import OrderStatus
 
@@ -7,15 +7,16 @@ from ..models.order import OrderStatus
 class OrderItemBase(BaseModel):
     product_id: int
     quantity: int = Field(..., gt=0)
-    unit_price: float = Field(..., gt=0)
 
 # Properties to receive on order item creation
 class OrderItemCreate(OrderItemBase):
-    pass
+    # Accepted for backwards compatibility but ignored: prices come from the catalog
+    unit_price: Optional[float] = None
 
 # Properties shared by models stored in DB
 class OrderItemInDBBase(OrderItemBase):
     id: int
+    unit_price: float
     order_id: int
     created_at: datetime
     updated_at: datetime
@@ -25,7 +26,9 @@ class OrderItemInDBBase(OrderItemBase):
 
 # Additional properties to return via API
 class OrderItem(OrderItemInDBBase):
-    pass
+    # Product snapshot, present only when requested with include_products
+    product_name: Optional[str] = None
+    product_unit: Optional[str] = None
 
 # Shared properties for Order
 class OrderBase(BaseModel):
@@ -34,7 +37,10 @@ class OrderBase(BaseModel):
 
 # Properties to receive on order creation
 class OrderCreate(OrderBase):
-    items: List[OrderItemCreate]
+    # Orders always start pending: stock is reserved on creation and only
+    # given back by a transition into cancelled
+    status: Literal[OrderStatus.PENDING] = OrderStatus.PENDING
+    items: List[OrderItemCreate] = Field(..., min_length=1)
 
 # Properties to receive on order update
 class OrderUpdate(OrderBase):
@@ -58,3 +64,21 @@ class Order(OrderInDBBase):
 # Additional properties stored in DB
 class OrderInDB(OrderInDBBase):
     pass
+
+# Move many orders to one status
+class OrderStatusBulkUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=500)
+    status: OrderStatus
+
+# What happened to one order in a bulk status update
+class OrderStatusOutcome(BaseModel):
+    order_id: int
+    # updated, unchanged, invalid_transition, insufficient_stock or not_found
+    outcome: str
+    # Status after the update; None if the order does not exist
+    status: Optional[OrderStatus] = None
+
+class OrderStatusBulkResult(BaseModel):
+    status: OrderStatus
+    updated: int
+    results: List[OrderStatusOutcome]
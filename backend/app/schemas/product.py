@@ -27,6 +27,7 @@ class ProductUpdate(ProductBase):
 class ProductInDBBase(ProductBase):
     id: int
     owner_id: int
+    stock_shards: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional, Union
+
+
+class Suggestion(BaseModel):
+    kind: Literal["product", "supplier"]
+    id: int
+    name: str
+    # Order items for the product, or across the supplier's products
+    popularity: int
+
+
+class FacetCount(BaseModel):
+    value: Union[int, str, None]
+    count: int
+
+
+class PriceRangeCount(BaseModel):
+    min: float
+    # None for the open-ended top bucket
+    max: Optional[float] = None
+    count: int
+
+
+class ProductFacetCounts(BaseModel):
+    # Products matching every filter
+    total: int
+    # Each facet applies every filter except its own
+    categories: List[FacetCount]
+    suppliers: List[FacetCount]
+    units: List[FacetCount]
+    price_ranges: List[PriceRangeCount]
+    in_stock: int
+    out_of_stock: int
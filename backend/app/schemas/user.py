@@ -19,6 +19,7 @@ class UserCreate(UserBase):
 # Properties to receive via API on update
 class UserUpdate(UserBase):
     password: Optional[str] = Field(None, min_length=8)
+    is_active: Optional[bool] = None
 
 # Properties shared by models stored in DB
 class UserInDBBase(UserBase):
@@ -42,4 +43,9 @@ class UserInDB(UserInDBBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
     user: Optional[Dict[str, Any]] = None
+
+# Refresh token exchange request
+class TokenRefresh(BaseModel):
+    refresh_token: str
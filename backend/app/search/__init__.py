@@ -0,0 +1,21 @@
+from .autocomplete import AutocompleteIndex, autocomplete_index
+from .facets import PRICE_BUCKETS, ProductFacets, ProductFilters, product_facets
+from .products import ProductSearch, product_search, search_terms
+from .schema import is_search_index_object
+from .suppliers import NGramIndex, SupplierSearch, supplier_search
+
+__all__ = [
+    'AutocompleteIndex',
+    'autocomplete_index',
+    'PRICE_BUCKETS',
+    'ProductFacets',
+    'ProductFilters',
+    'product_facets',
+    'ProductSearch',
+    'product_search',
+    'search_terms',
+    'NGramIndex',
+    'SupplierSearch',
+    'supplier_search',
+    'is_search_index_object',
+]
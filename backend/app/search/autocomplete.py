@@ -0,0 +1,280 @@
+import bisect
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+from ..core.events import PRODUCTS_CHANGED, SUPPLIERS_CHANGED, event_bus
+
+PRODUCT = "product"
+SUPPLIER = "supplier"
+KINDS = (PRODUCT, SUPPLIER)
+
+# Most suggestions one request can ask for
+MAX_SUGGESTIONS = 20
+# Prefixes up to this long keep a precomputed top list instead of scanning
+# their (potentially catalog-sized) range of the sorted keys
+SHORT_PREFIX = 2
+# Refs kept per short-prefix top list; the slack beyond MAX_SUGGESTIONS lets
+# deletes shorten a list without rescanning its prefix
+TOP_CAPACITY = 2 * MAX_SUGGESTIONS
+
+Ref = Tuple[str, int]
+TopKey = Tuple[Optional[str], str]
+
+
+def normalize(text: Optional[str]) -> str:
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
+
+
+def name_keys(name: str) -> List[str]:
+    """
+    The name and every suffix of it starting at a word, so "Cherry Tomatoes"
+    completes from "che" and from "tom".
+    """
+    words = normalize(name).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class AutocompleteIndex:
+    """
+    In-memory prefix index over product and supplier names.
+
+    Keys live in one sorted array searched with ``bisect``; a prefix query is
+    the contiguous run of keys starting at the insertion point, ranked by
+    popularity (order items per product, and per supplier across its products).
+    Short prefixes, whose runs span much of the catalog, keep precomputed top
+    lists instead, which name changes update in place. A list that had to be
+    cut off at ``TOP_CAPACITY`` and loses too many refs is rebuilt from its
+    run when next looked up. Lookups never touch the database. Names are kept
+    current from PRODUCTS_CHANGED and SUPPLIERS_CHANGED events; popularity is
+    reloaded by ``rebuild``, which the application runs every
+    ``refresh_seconds``.
+    """
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._refs: List[Ref] = []
+        self._names: Dict[Ref, str] = {}
+        self._popularity: Dict[Ref, int] = {}
+        # (kind or None, short prefix) -> best refs
+        self._top: Dict[TopKey, List[Ref]] = {}
+        # Top lists missing some of their prefix's refs, and those of them
+        # too short to answer lookups until rescanned
+        self._truncated: Set[TopKey] = set()
+        self._stale_top: Set[TopKey] = set()
+        self.built_at: Optional[float] = None
+        self.lookups = 0
+        self.updates = 0
+        event_bus.subscribe(PRODUCTS_CHANGED, self._on_products_changed)
+        event_bus.subscribe(SUPPLIERS_CHANGED, self._on_suppliers_changed)
+
+    def _rank(self, ref: Ref, key: str) -> tuple:
+        # Most popular first; names that start with the prefix beat mid-name
+        # matches; then alphabetical for stable ordering
+        name = self._names[ref]
+        return (-self._popularity.get(ref, 0), not normalize(name).startswith(key), name.lower(), ref)
+
+    def _short_prefixes(self, ref: Ref) -> Iterable[str]:
+        prefixes = set()
+        for key in name_keys(self._names[ref]):
+            prefixes.update(key[:length] for length in range(1, SHORT_PREFIX + 1) if len(key) >= length)
+        return prefixes
+
+    def _scan(self, prefix: str) -> Dict[Ref, None]:
+        """
+        Refs with a key starting with ``prefix``, deduplicated, in key order.
+        """
+        start = bisect.bisect_left(self._keys, prefix)
+        refs: Dict[Ref, None] = {}
+        for i in range(start, len(self._keys)):
+            if not self._keys[i].startswith(prefix):
+                break
+            refs[self._refs[i]] = None
+        return refs
+
+    def _best(self, refs: Iterable[Ref], prefix: str, limit: int) -> List[Ref]:
+        return sorted(refs, key=lambda ref: self._rank(ref, prefix))[:limit]
+
+    def _fill_top(self, prefix: str, kinds: Iterable[Optional[str]]) -> None:
+        refs = self._scan(prefix)
+        for kind in kinds:
+            top_key = (kind, prefix)
+            matches = [ref for ref in refs if kind in (None, ref[0])]
+            best = self._best(matches, prefix, TOP_CAPACITY)
+            if best:
+                self._top[top_key] = best
+            else:
+                self._top.pop(top_key, None)
+            if len(matches) > TOP_CAPACITY:
+                self._truncated.add(top_key)
+            else:
+                self._truncated.discard(top_key)
+            self._stale_top.discard(top_key)
+
+    def _drop_top(self, ref: Ref, prefixes: Iterable[str]) -> None:
+        for prefix in prefixes:
+            for kind in (None, ref[0]):
+                top_key = (kind, prefix)
+                top = self._top.get(top_key)
+                if not top or ref not in top:
+                    continue
+                top.remove(ref)
+                if top_key in self._truncated:
+                    if len(top) < MAX_SUGGESTIONS:
+                        self._stale_top.add(top_key)
+                elif not top:
+                    del self._top[top_key]
+
+    def _insert_top(self, ref: Ref, prefixes: Iterable[str]) -> None:
+        for prefix in prefixes:
+            for kind in (None, ref[0]):
+                top_key = (kind, prefix)
+                if top_key in self._stale_top:
+                    continue
+                top = self._top.setdefault(top_key, [])
+                i = bisect.bisect_left([self._rank(other, prefix) for other in top], self._rank(ref, prefix))
+                # Past the end of a cut-off list, refs that were cut may rank higher
+                if i == len(top) and top_key in self._truncated:
+                    continue
+                top.insert(i, ref)
+                if len(top) > TOP_CAPACITY:
+                    del top[TOP_CAPACITY:]
+                    self._truncated.add(top_key)
+
+    def rebuild(self, db: Session) -> None:
+        """
+        Reload every name and popularity count from the database.
+        """
+        names: Dict[Ref, str] = {}
+        for id, name in db.execute(select(models.Product.id, models.Product.name)):
+            names[(PRODUCT, id)] = name
+        for id, name in db.execute(select(models.Supplier.id, models.Supplier.name)):
+            names[(SUPPLIER, id)] = name
+        popularity: Dict[Ref, int] = {}
+        for product_id, count in db.execute(
+            select(models.OrderItem.product_id, func.count(models.OrderItem.id))
+            .group_by(models.OrderItem.product_id)
+        ):
+            popularity[(PRODUCT, product_id)] = count
+        for supplier_id, count in db.execute(
+            select(models.Product.supplier_id, func.count(models.OrderItem.id))
+            .join(models.OrderItem, models.OrderItem.product_id == models.Product.id)
+            .where(models.Product.supplier_id.isnot(None))
+            .group_by(models.Product.supplier_id)
+        ):
+            popularity[(SUPPLIER, supplier_id)] = count
+        entries = sorted((key, ref) for ref, name in names.items() for key in name_keys(name))
+
+        with self._lock:
+            self._names = names
+            self._popularity = popularity
+            self._keys = [key for key, _ in entries]
+            self._refs = [ref for _, ref in entries]
+            self._top = {}
+            self._truncated = set()
+            self._stale_top = set()
+            short = set()
+            for ref in names:
+                short.update(self._short_prefixes(ref))
+            for prefix in short:
+                self._fill_top(prefix, (None,) + KINDS)
+            self.built_at = time.monotonic()
+
+    def _remove(self, ref: Ref) -> None:
+        if ref not in self._names:
+            return
+        self._drop_top(ref, self._short_prefixes(ref))
+        for key in name_keys(self._names[ref]):
+            i = bisect.bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key:
+                if self._refs[i] == ref:
+                    del self._keys[i]
+                    del self._refs[i]
+                    break
+                i += 1
+        del self._names[ref]
+
+    def _add(self, ref: Ref, name: str) -> None:
+        self._names[ref] = name
+        for key in name_keys(name):
+            i = bisect.bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key and self._refs[i] < ref:
+                i += 1
+            self._keys.insert(i, key)
+            self._refs.insert(i, ref)
+        self._insert_top(ref, self._short_prefixes(ref))
+
+    def upsert(self, kind: str, id: int, name: str) -> None:
+        ref = (kind, id)
+        with self._lock:
+            if self._names.get(ref) == name:
+                return
+            self._remove(ref)
+            self._add(ref, name)
+            self.updates += 1
+
+    def delete(self, kind: str, id: int) -> None:
+        with self._lock:
+            self._remove((kind, id))
+            self._popularity.pop((kind, id), None)
+            self.updates += 1
+
+    def _apply(self, kind: str, action: str, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            if action == "delete":
+                self.delete(kind, row["id"])
+            else:
+                self.upsert(kind, row["id"], row["name"])
+
+    def _on_products_changed(self, payload: Dict[str, Any]) -> None:
+        self._apply(PRODUCT, payload["action"], payload["products"])
+
+    def _on_suppliers_changed(self, payload: Dict[str, Any]) -> None:
+        self._apply(SUPPLIER, payload["action"], payload.get("suppliers", []))
+
+    def suggest(self, query: str, *, limit: int = 10, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Best completions for ``query``, most popular first.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        with self._lock:
+            self.lookups += 1
+            if len(prefix) <= SHORT_PREFIX:
+                if (kind, prefix) in self._stale_top:
+                    self._fill_top(prefix, (kind,))
+                refs = self._top.get((kind, prefix), [])
+            else:
+                refs = (ref for ref in self._scan(prefix) if kind in (None, ref[0]))
+                refs = self._best(refs, prefix, limit)
+            return [
+                {
+                    "kind": ref[0],
+                    "id": ref[1],
+                    "name": self._names[ref],
+                    "popularity": self._popularity.get(ref, 0),
+                }
+                for ref in refs[:limit]
+            ]
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._names),
+                "keys": len(self._keys),
+                "short_prefixes": len(self._top),
+                "stale_short_prefixes": len(self._stale_top),
+                "lookups": self.lookups,
+                "updates": self.updates,
+            }
+
+
+autocomplete_index = AutocompleteIndex(refresh_seconds=settings.AUTOCOMPLETE_REFRESH_SECONDS)
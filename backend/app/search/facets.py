@@ -0,0 +1,272 @@
+import bisect
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.config import settings
+from ..core.events import PRODUCTS_CHANGED, STOCK_CHANGED, event_bus
+
+# Lower bounds of the price facet's buckets; the last bucket is open-ended
+PRICE_BUCKETS = (0.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0)
+
+# Stock levels reloaded per query when catching up on STOCK_CHANGED events
+STOCK_BATCH = 500
+
+# Facet dimensions, in the order of a cell's fields
+CATEGORY = "category"
+SUPPLIER = "supplier"
+PRICE = "price"
+UNIT = "unit"
+IN_STOCK = "in_stock"
+
+# (category, supplier id, price, unit, in stock); cells hold a price bucket
+# in place of the price
+Row = Tuple[str, Optional[int], float, str, bool]
+
+
+def price_bucket(price: float) -> int:
+    return max(bisect.bisect_right(PRICE_BUCKETS, price) - 1, 0)
+
+
+def _value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+@dataclass(frozen=True)
+class ProductFilters:
+    """
+    Structured catalog filters, applied as SQL criteria by product listings
+    and in memory by facet counts.
+    """
+    category: Optional[str] = None
+    supplier_id: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock: Optional[bool] = None
+    unit: Optional[str] = None
+
+    def criteria(self) -> list:
+        product = models.Product
+        criteria = []
+        if self.category is not None:
+            criteria.append(product.category == self.category)
+        if self.supplier_id is not None:
+            criteria.append(product.supplier_id == self.supplier_id)
+        if self.min_price is not None:
+            criteria.append(product.price >= self.min_price)
+        if self.max_price is not None:
+            criteria.append(product.price <= self.max_price)
+        if self.in_stock is not None:
+            criteria.append(product.stock_quantity > 0 if self.in_stock else product.stock_quantity <= 0)
+        if self.unit is not None:
+            criteria.append(product.unit == self.unit)
+        return criteria
+
+    @property
+    def has_price_range(self) -> bool:
+        return self.min_price is not None or self.max_price is not None
+
+    def failures(
+        self, category: str, supplier_id: Optional[int], price: Optional[float], unit: str, in_stock: bool
+    ) -> List[str]:
+        """
+        Dimensions whose filter rejects the given values; ``price`` is None
+        when counting cells, which only happens without a price range.
+        """
+        failed = []
+        if self.category is not None and category != _value(self.category):
+            failed.append(CATEGORY)
+        if self.supplier_id is not None and supplier_id != self.supplier_id:
+            failed.append(SUPPLIER)
+        if price is not None and (
+            (self.min_price is not None and price < self.min_price)
+            or (self.max_price is not None and price > self.max_price)
+        ):
+            failed.append(PRICE)
+        if self.unit is not None and unit != self.unit:
+            failed.append(UNIT)
+        if self.in_stock is not None and in_stock != self.in_stock:
+            failed.append(IN_STOCK)
+        return failed
+
+
+class ProductFacets:
+    """
+    In-process facet counts for the product catalog.
+
+    Every product is reduced to (category, supplier, price, unit, in stock),
+    and products sharing all of those but the exact price are tallied in one
+    cell per price bucket, so counting scans a few cells rather than the
+    catalog. Product creates, updates and deletes arrive as PRODUCTS_CHANGED
+    snapshots and move one product between cells. STOCK_CHANGED only names the
+    products whose stock moved; their levels are reloaded by id on the next
+    ``refresh_async``. The whole index is reloaded once it is older than
+    ``refresh_seconds``, which also picks up changes made by other workers.
+    """
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._products: Dict[int, Row] = {}
+        self._cells: Counter = Counter()
+        self._stock_dirty: Set[int] = set()
+        self._built_at: Optional[float] = None
+        self.rebuilds = 0
+        self.updates = 0
+        self.stock_reloads = 0
+        event_bus.subscribe(PRODUCTS_CHANGED, self._on_products_changed)
+        event_bus.subscribe(STOCK_CHANGED, self._on_stock_changed)
+
+    @property
+    def stale(self) -> bool:
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at >= self.refresh_seconds
+
+    @staticmethod
+    def _row(category: Any, supplier_id: Optional[int], price: float, unit: str, stock_quantity: int) -> Row:
+        return (_value(category), supplier_id, float(price), unit, stock_quantity > 0)
+
+    @staticmethod
+    def _cell(row: Row) -> tuple:
+        category, supplier_id, price, unit, in_stock = row
+        return (category, supplier_id, price_bucket(price), unit, in_stock)
+
+    def _put(self, product_id: int, row: Optional[Row]) -> None:
+        previous = self._products.pop(product_id, None)
+        if previous is not None:
+            cell = self._cell(previous)
+            self._cells[cell] -= 1
+            if not self._cells[cell]:
+                del self._cells[cell]
+        if row is not None:
+            self._products[product_id] = row
+            self._cells[self._cell(row)] += 1
+
+    def _on_products_changed(self, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            for product in payload["products"]:
+                if payload["action"] == "delete":
+                    self._put(product["id"], None)
+                else:
+                    self._put(product["id"], self._row(
+                        product["category"], product["supplier_id"], product["price"],
+                        product["unit"], product["stock_quantity"],
+                    ))
+                self.updates += 1
+
+    def _on_stock_changed(self, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._built_at is not None:
+                self._stock_dirty.update(payload["product_ids"])
+
+    async def refresh_async(self, db: AsyncSession) -> None:
+        """
+        Reload everything if stale, else just the stock of products named by
+        STOCK_CHANGED since the last refresh.
+        """
+        if self.stale:
+            with self._lock:
+                self._stock_dirty.clear()
+            result = await db.execute(select(
+                models.Product.id, models.Product.category, models.Product.supplier_id,
+                models.Product.price, models.Product.unit, models.Product.stock_quantity,
+            ))
+            products = {row.id: self._row(*row[1:]) for row in result}
+            cells = Counter(self._cell(row) for row in products.values())
+            with self._lock:
+                self._products = products
+                self._cells = cells
+                self._built_at = time.monotonic()
+                self.rebuilds += 1
+            return
+
+        with self._lock:
+            dirty = sorted(self._stock_dirty)
+            self._stock_dirty.clear()
+        for start in range(0, len(dirty), STOCK_BATCH):
+            result = await db.execute(
+                select(models.Product.id, models.Product.stock_quantity)
+                .where(models.Product.id.in_(dirty[start:start + STOCK_BATCH]))
+            )
+            with self._lock:
+                for product_id, stock_quantity in result:
+                    row = self._products.get(product_id)
+                    if row is not None and row[4] != (stock_quantity > 0):
+                        self._put(product_id, row[:4] + (stock_quantity > 0,))
+                self.stock_reloads += 1
+
+    def counts(self, filters: ProductFilters) -> Dict[str, Any]:
+        """
+        Facet counts for ``filters``. Each dimension is counted with every
+        filter applied except its own, so a chosen category still shows the
+        others it could switch to.
+        """
+        facets: Dict[str, Counter] = {
+            dimension: Counter() for dimension in (CATEGORY, SUPPLIER, PRICE, UNIT, IN_STOCK)
+        }
+        total = 0
+        with self._lock:
+            if filters.has_price_range:
+                # Exact prices are needed to apply the range
+                entries = [
+                    (category, supplier_id, price, price_bucket(price), unit, in_stock, 1)
+                    for category, supplier_id, price, unit, in_stock in self._products.values()
+                ]
+            else:
+                entries = [
+                    (category, supplier_id, None, bucket, unit, in_stock, count)
+                    for (category, supplier_id, bucket, unit, in_stock), count in self._cells.items()
+                ]
+        for category, supplier_id, price, bucket, unit, in_stock, count in entries:
+            failed = filters.failures(category, supplier_id, price, unit, in_stock)
+            if len(failed) > 1:
+                continue
+            values = {CATEGORY: category, SUPPLIER: supplier_id, PRICE: bucket, UNIT: unit, IN_STOCK: in_stock}
+            for dimension in (failed or values):
+                facets[dimension][values[dimension]] += count
+            if not failed:
+                total += count
+
+        def ranked(counter: Counter) -> List[Dict[str, Any]]:
+            return [
+                {"value": value, "count": count}
+                for value, count in sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))
+            ]
+
+        return {
+            "total": total,
+            "categories": ranked(facets[CATEGORY]),
+            "suppliers": ranked(facets[SUPPLIER]),
+            "units": ranked(facets[UNIT]),
+            "price_ranges": [
+                {
+                    "min": PRICE_BUCKETS[bucket],
+                    "max": PRICE_BUCKETS[bucket + 1] if bucket + 1 < len(PRICE_BUCKETS) else None,
+                    "count": facets[PRICE][bucket],
+                }
+                for bucket in sorted(facets[PRICE])
+            ],
+            "in_stock": facets[IN_STOCK][True],
+            "out_of_stock": facets[IN_STOCK][False],
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "products": len(self._products),
+                "cells": len(self._cells),
+                "stock_dirty": len(self._stock_dirty),
+                "rebuilds": self.rebuilds,
+                "updates": self.updates,
+                "stock_reloads": self.stock_reloads,
+            }
+
+
+product_facets = ProductFacets(refresh_seconds=settings.FACETS_REFRESH_SECONDS)
@@ -0,0 +1,157 @@
+import re
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Float, column, func, inspect, literal_column, select, table
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.pagination import Keyset
+from .schema import PRODUCT_FTS_TABLE, PRODUCT_SEARCH_VECTOR
+
+# Terms beyond this are ignored so a pasted paragraph cannot build a huge query
+MAX_TERMS = 8
+
+# bm25 column weights for (name, description) on SQLite
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Backends, picked by ``ProductSearch.configure``
+POSTGRES_FTS = "postgresql"
+SQLITE_FTS = "sqlite"
+ILIKE = "ilike"
+
+# Tag of search result cursors, which browsing sorts refuse and vice versa
+SEARCH_CURSOR_TAG = "search"
+
+
+def search_terms(query: str) -> List[str]:
+    """
+    Lowercased word tokens of ``query``; punctuation never reaches the
+    full-text query syntax.
+    """
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+class ProductSearch:
+    """
+    Ranked full-text search over product names and descriptions.
+
+    On PostgreSQL products carry a generated ``search_vector`` column (name
+    weighted above description) with a GIN index and are ranked with
+    ``ts_rank_cd``. On SQLite an external-content FTS5 table, kept in step
+    with ``products`` by triggers, is ranked with bm25. Either way the index
+    is maintained by the database as products are created, updated and
+    deleted, every term is matched as a prefix, all terms must match, and
+    results page by (rank, id) cursors. Databases without the index fall back
+    to ILIKE scans in newest-first order.
+    """
+    def __init__(self):
+        self.backend = ILIKE
+        self._fallback_keyset = Keyset(models.Product.created_at, models.Product.id, tag=SEARCH_CURSOR_TAG)
+        # Only needs the cursor keys; per-query keysets compare the real rank
+        self._ranked_keyset = Keyset(column("search_rank", Float), models.Product.id, tag=SEARCH_CURSOR_TAG)
+
+    def configure(self, engine: Engine) -> str:
+        """
+        Use the full-text index if migrations have created it on ``engine``.
+        """
+        inspector = inspect(engine)
+        if engine.dialect.name == "postgresql":
+            columns = {col["name"] for col in inspector.get_columns(models.Product.__tablename__)}
+            self.backend = POSTGRES_FTS if PRODUCT_SEARCH_VECTOR in columns else ILIKE
+        elif engine.dialect.name == "sqlite":
+            self.backend = SQLITE_FTS if inspector.has_table(PRODUCT_FTS_TABLE) else ILIKE
+        else:
+            self.backend = ILIKE
+        return self.backend
+
+    @property
+    def keyset(self) -> Keyset:
+        """
+        Keyset that builds next-page cursors for search results.
+        """
+        return self._fallback_keyset if self.backend == ILIKE else self._ranked_keyset
+
+    def _ilike_statement(
+        self, query: str, criteria: Sequence, *, skip: int, limit: int, cursor: Optional[str]
+    ):
+        search = f"%{query}%"
+        return self._fallback_keyset.paginate(
+            select(models.Product).where(
+                (models.Product.name.ilike(search)) |
+                (models.Product.description.ilike(search)),
+                *criteria
+            ),
+            skip=skip, limit=limit, cursor=cursor
+        )
+
+    def statement(
+        self, query: str, *, criteria: Sequence = (), skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
+    ):
+        """
+        Search query for the configured backend: (Product, search_rank) rows
+        best first, plain Product rows for ILIKE, or None if the query has no
+        searchable terms. ``criteria`` further narrow the matches.
+        """
+        if self.backend == ILIKE:
+            return self._ilike_statement(query, criteria, skip=skip, limit=limit, cursor=cursor)
+        terms = search_terms(query)
+        if not terms:
+            return None
+        if self.backend == POSTGRES_FTS:
+            vector = literal_column(f"{models.Product.__tablename__}.{PRODUCT_SEARCH_VECTOR}")
+            tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            rank = func.ts_rank_cd(vector, tsquery, type_=Float)
+            stmt = select(models.Product, rank.label("search_rank")).where(vector.op("@@")(tsquery))
+        else:
+            fts = table(PRODUCT_FTS_TABLE, column("rowid"))
+            fts_name = literal_column(PRODUCT_FTS_TABLE)
+            # bm25 is lower-is-better; negate it so every backend ranks descending
+            rank = -func.bm25(fts_name, NAME_WEIGHT, DESCRIPTION_WEIGHT, type_=Float)
+            stmt = (
+                select(models.Product, rank.label("search_rank"))
+                .join(fts, fts.c.rowid == models.Product.id)
+                .where(fts_name.op("MATCH")(" ".join(f'"{term}"*' for term in terms)))
+            )
+        keyset = Keyset(rank, models.Product.id, tag=SEARCH_CURSOR_TAG)
+        return keyset.paginate(stmt.where(*criteria), skip=skip, limit=limit, cursor=cursor)
+
+    def _products(self, rows) -> List[models.Product]:
+        if self.backend == ILIKE:
+            return rows.scalars().all()
+        products = []
+        for product, rank in rows:
+            # Read back by the cursor keyset
+            product.search_rank = rank
+            products.append(product)
+        return products
+
+    def search(
+        self, db: Session, *, query: str, criteria: Sequence = (), skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[models.Product]:
+        """
+        Products matching ``query``, best match first.
+        """
+        stmt = self.statement(query, criteria=criteria, skip=skip, limit=limit, cursor=cursor)
+        if stmt is None:
+            return []
+        return self._products(db.execute(stmt))
+
+    async def search_async(
+        self, db: AsyncSession, *, query: str, criteria: Sequence = (), skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[models.Product]:
+        """
+        Products matching ``query``, best match first.
+        """
+        stmt = self.statement(query, criteria=criteria, skip=skip, limit=limit, cursor=cursor)
+        if stmt is None:
+            return []
+        return self._products(await db.execute(stmt))
+
+
+product_search = ProductSearch()
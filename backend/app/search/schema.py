@@ -0,0 +1,24 @@
+# Database objects that back the search indexes. They are created by raw-SQL
+# migrations for one dialect only, so autogenerate must not treat them as drift.
+PRODUCT_FTS_TABLE = "products_fts"
+PRODUCT_SEARCH_VECTOR = "search_vector"
+PRODUCT_SEARCH_VECTOR_INDEX = "ix_products_search_vector"
+SUPPLIER_TRIGRAM_INDEXES = (
+    "ix_suppliers_name_trgm",
+    "ix_suppliers_description_trgm",
+    "ix_suppliers_category_trgm",
+)
+
+SEARCH_INDEX_OBJECTS = {
+    PRODUCT_FTS_TABLE,
+    PRODUCT_SEARCH_VECTOR,
+    PRODUCT_SEARCH_VECTOR_INDEX,
+    *SUPPLIER_TRIGRAM_INDEXES,
+}
+
+
+def is_search_index_object(name: str, type_: str) -> bool:
+    """True for search index objects, including FTS5 shadow tables."""
+    if name in SEARCH_INDEX_OBJECTS:
+        return True
+    return type_ == "table" and name.startswith(f"{PRODUCT_FTS_TABLE}_")
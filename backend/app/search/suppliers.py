@@ -0,0 +1,299 @@
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from sqlalchemy import Float, case, column, func, literal, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.config import settings
+from ..core.events import SUPPLIERS_CHANGED, event_bus
+from ..core.pagination import InvalidCursor, Keyset, decode_cursor
+
+# Minimum similarities for a match, matching pg_trgm's defaults for the
+# % (similarity) and <% (word_similarity) operators
+SIMILARITY_THRESHOLD = 0.3
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+# Description matches count for less than name matches
+DESCRIPTION_FACTOR = 0.5
+
+# Score = text similarity blended with supplier quality signals
+SIMILARITY_WEIGHT = 0.7
+RATING_WEIGHT = 0.15
+VERIFIED_WEIGHT = 0.1
+REVIEWS_WEIGHT = 0.05
+# Review counts at or above this get the full reviews weight
+REVIEWS_SATURATION = 500
+
+# Backends, picked by ``SupplierSearch.configure``
+PG_TRGM = "pg_trgm"
+NGRAM = "ngram"
+
+
+def trigrams(text: Optional[str]) -> FrozenSet[str]:
+    """
+    pg_trgm-style trigrams: each lowercased word padded with two spaces in
+    front and one behind.
+    """
+    grams: Set[str] = set()
+    for word in re.findall(r"\w+", (text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(query: FrozenSet[str], target: FrozenSet[str]) -> float:
+    """
+    Shared trigrams over all trigrams of both strings, like pg_trgm's similarity().
+    """
+    if not query or not target:
+        return 0.0
+    shared = len(query & target)
+    return shared / (len(query) + len(target) - shared)
+
+
+def word_similarity(query: FrozenSet[str], target: FrozenSet[str]) -> float:
+    """
+    Share of the query's trigrams found in ``target``; approximates
+    pg_trgm's word_similarity() for a query that is a word or prefix of it.
+    """
+    if not query:
+        return 0.0
+    return len(query & target) / len(query)
+
+
+def quality(rating: Optional[float], verified: Optional[bool], review_count: Optional[int]) -> float:
+    """
+    Weighted 0..0.3 quality boost from rating, verification and review volume.
+    """
+    reviews = min(1.0, math.log1p(review_count or 0) / math.log1p(REVIEWS_SATURATION))
+    return (
+        RATING_WEIGHT * (rating or 0.0) / 5.0
+        + (VERIFIED_WEIGHT if verified else 0.0)
+        + REVIEWS_WEIGHT * reviews
+    )
+
+
+@dataclass(frozen=True)
+class _Entry:
+    name: FrozenSet[str]
+    description: FrozenSet[str]
+    category: str
+    quality: float
+
+
+class NGramIndex:
+    """
+    In-process trigram index over supplier names and descriptions.
+
+    Used where pg_trgm is not available. The index is rebuilt from the
+    database when it is older than ``refresh_seconds`` or a SUPPLIERS_CHANGED
+    event marked it stale, and swapped in whole, so readers never see a
+    half-built index. A query only scores suppliers sharing at least one
+    trigram with it.
+    """
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[int, _Entry] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._built_at: Optional[float] = None
+        self.rebuilds = 0
+
+    def invalidate(self, payload: Any = None) -> None:
+        with self._lock:
+            self._built_at = None
+
+    @property
+    def stale(self) -> bool:
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at >= self.refresh_seconds
+
+    def _statement(self):
+        return select(
+            models.Supplier.id, models.Supplier.name, models.Supplier.description,
+            models.Supplier.category, models.Supplier.rating, models.Supplier.verified,
+            models.Supplier.review_count,
+        )
+
+    def _build(self, rows) -> None:
+        entries: Dict[int, _Entry] = {}
+        postings: Dict[str, Set[int]] = {}
+        for row in rows:
+            entry = _Entry(
+                name=trigrams(row.name),
+                description=trigrams(row.description),
+                category=(row.category or "").lower(),
+                quality=quality(row.rating, row.verified, row.review_count),
+            )
+            entries[row.id] = entry
+            for gram in entry.name | entry.description:
+                postings.setdefault(gram, set()).add(row.id)
+        with self._lock:
+            self._entries = entries
+            self._postings = postings
+            self._built_at = time.monotonic()
+            self.rebuilds += 1
+
+    async def refresh_async(self, db: AsyncSession) -> None:
+        if self.stale:
+            self._build((await db.execute(self._statement())).all())
+
+    def search(self, query: str, category: Optional[str] = None) -> List[Tuple[float, int]]:
+        """
+        (score, supplier id) for every match, best first.
+        """
+        grams = trigrams(query)
+        category = category.lower() if category else None
+        with self._lock:
+            entries, postings = self._entries, self._postings
+        candidates: Set[int] = set()
+        for gram in grams:
+            candidates |= postings.get(gram, set())
+        ranked = []
+        for supplier_id in candidates:
+            entry = entries[supplier_id]
+            if category and category not in entry.category:
+                continue
+            name_similarity = similarity(grams, entry.name)
+            name_word_similarity = word_similarity(grams, entry.name)
+            description_similarity = word_similarity(grams, entry.description)
+            if (
+                name_similarity < SIMILARITY_THRESHOLD
+                and name_word_similarity < WORD_SIMILARITY_THRESHOLD
+                and description_similarity < WORD_SIMILARITY_THRESHOLD
+            ):
+                continue
+            text_score = max(
+                name_similarity, name_word_similarity, DESCRIPTION_FACTOR * description_similarity
+            )
+            ranked.append((SIMILARITY_WEIGHT * text_score + entry.quality, supplier_id))
+        ranked.sort(reverse=True)
+        return ranked
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "suppliers": len(self._entries),
+                "trigrams": len(self._postings),
+                "rebuilds": self.rebuilds,
+            }
+
+
+class SupplierSearch:
+    """
+    Typo-tolerant supplier search ranked by trigram similarity blended with
+    rating, verification and review count.
+
+    On PostgreSQL with pg_trgm the filtering uses GIN trigram indexes and the
+    database computes the score. Elsewhere an in-process NGramIndex ranks the
+    matches and only the requested page is loaded. Results page by
+    (score, id) cursors either way.
+    """
+    def __init__(self, refresh_seconds: float):
+        self.backend = NGRAM
+        self.index = NGramIndex(refresh_seconds)
+        # Only needs the cursor keys; pg_trgm keysets compare the real score
+        self.keyset = Keyset(column("search_score", Float), models.Supplier.id)
+        event_bus.subscribe(SUPPLIERS_CHANGED, self.index.invalidate)
+
+    def configure(self, engine: Engine) -> str:
+        """
+        Use pg_trgm if the migrations could install it on ``engine``.
+        """
+        self.backend = NGRAM
+        if engine.dialect.name == "postgresql":
+            with engine.connect() as conn:
+                installed = conn.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                ).first()
+            if installed:
+                self.backend = PG_TRGM
+        return self.backend
+
+    def _pg_trgm_statement(
+        self, query: str, category: Optional[str], *, skip: int, limit: int, cursor: Optional[str]
+    ):
+        name = models.Supplier.name
+        description = func.coalesce(models.Supplier.description, "")
+        term = literal(query)
+        text_score = func.greatest(
+            func.similarity(name, term),
+            func.word_similarity(term, name),
+            DESCRIPTION_FACTOR * func.word_similarity(term, description),
+        )
+        reviews = func.least(
+            1.0,
+            func.ln(1 + func.coalesce(models.Supplier.review_count, 0)) / math.log1p(REVIEWS_SATURATION),
+        )
+        score = (
+            SIMILARITY_WEIGHT * text_score
+            + RATING_WEIGHT * func.coalesce(models.Supplier.rating, 0.0) / 5.0
+            + case((models.Supplier.verified, VERIFIED_WEIGHT), else_=0.0)
+            + REVIEWS_WEIGHT * reviews
+        )
+        score = score.cast(Float)
+        stmt = select(models.Supplier, score.label("search_score")).where(
+            or_(
+                name.op("%")(term),
+                term.op("<%")(name),
+                term.op("<%")(models.Supplier.description),
+            )
+        )
+        if category:
+            stmt = stmt.where(models.Supplier.category.ilike(f"%{category}%"))
+        return Keyset(score, models.Supplier.id).paginate(stmt, skip=skip, limit=limit, cursor=cursor)
+
+    async def search_async(
+        self, db: AsyncSession, *, query: str, category: Optional[str] = None,
+        skip: int = 0, limit: int = 10, cursor: Optional[str] = None
+    ) -> List[models.Supplier]:
+        """
+        Suppliers matching ``query``, best first.
+        """
+        if self.backend == PG_TRGM:
+            rows = await db.execute(
+                self._pg_trgm_statement(query, category, skip=skip, limit=limit, cursor=cursor)
+            )
+            suppliers = []
+            for supplier, score in rows:
+                supplier.search_score = score
+                suppliers.append(supplier)
+            return suppliers
+
+        await self.index.refresh_async(db)
+        ranked = self.index.search(query, category)
+        if cursor:
+            score, supplier_id = decode_cursor(cursor, 2)
+            try:
+                after = (float(score), int(supplier_id))
+            except (TypeError, ValueError):
+                raise InvalidCursor("Malformed pagination cursor")
+            ranked = [hit for hit in ranked if hit < after]
+        else:
+            ranked = ranked[skip:]
+        page = ranked[:limit]
+        if not page:
+            return []
+        result = await db.execute(
+            select(models.Supplier).where(models.Supplier.id.in_([supplier_id for _, supplier_id in page]))
+        )
+        by_id = {supplier.id: supplier for supplier in result.scalars()}
+        suppliers = []
+        for score, supplier_id in page:
+            # Deleted since the index was built
+            if supplier_id in by_id:
+                by_id[supplier_id].search_score = score
+                suppliers.append(by_id[supplier_id])
+        return suppliers
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"backend": self.backend, **self.index.metrics()}
+
+
+supplier_search = SupplierSearch(refresh_seconds=settings.SUPPLIER_SEARCH_REFRESH_SECONDS)
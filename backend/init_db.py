@@ -1,6 +1,7 @@
 """
 Initialize the database by creating it and running migrations.
 """
+import os
 import subprocess
 import sys
 from sqlalchemy import create_engine, text
@@ -29,15 +30,23 @@ def create_database():
         sys.exit(1)
 
 def create_tables():
-    """Create all tables."""
+    """Bring the schema up to date with the Alembic migrations."""
     try:
+        from alembic import command
+        from alembic.config import Config
+        from sqlalchemy import inspect
         from app.database.database import engine
-        from app import models
-        
-        models.Base.metadata.create_all(bind=engine)
-        print("✓ All tables created successfully")
+
+        config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+        tables = inspect(engine).get_table_names()
+        if "users" in tables and "alembic_version" not in tables:
+            # Created by the old import-time create_all(): same schema as the baseline
+            command.stamp(config, "0001")
+            print("✓ Existing schema stamped at baseline revision 0001")
+        command.upgrade(config, "head")
+        print("✓ Database schema is up to date")
     except Exception as e:
-        print(f"✗ Error creating tables: {e}")
+        print(f"✗ Error running migrations: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
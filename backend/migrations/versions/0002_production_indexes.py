@@ -0,0 +1,71 @@
+"""Indexes for the hot list, dashboard and inbox queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_conversations_user1_id', 'conversations', ['user1_id'], unique=False)
+    op.create_index('ix_conversations_user2_id', 'conversations', ['user2_id'], unique=False)
+
+    op.create_index('ix_link_requests_supplier_id_status', 'link_requests', ['supplier_id', 'status'], unique=False)
+    op.create_index('ix_link_requests_user_id_status', 'link_requests', ['user_id', 'status'], unique=False)
+
+    op.create_index('ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at'], unique=False)
+
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'], unique=False)
+
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_supplier_id_created_at', 'orders', ['supplier_id', 'created_at'], unique=False)
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+
+    op.create_index('ix_products_category', 'products', ['category'], unique=False)
+    op.create_index('ix_products_owner_id', 'products', ['owner_id'], unique=False)
+    op.create_index('ix_products_supplier_id', 'products', ['supplier_id'], unique=False)
+
+    op.create_index('ix_suppliers_user_id', 'suppliers', ['user_id'], unique=False)
+
+    op.create_index('ix_team_members_supplier_id_user_id', 'team_members', ['supplier_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_team_members_supplier_id_user_id', table_name='team_members')
+
+    op.drop_index('ix_suppliers_user_id', table_name='suppliers')
+
+    op.drop_index('ix_products_supplier_id', table_name='products')
+    op.drop_index('ix_products_owner_id', table_name='products')
+    op.drop_index('ix_products_category', table_name='products')
+
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+    op.drop_index('ix_orders_supplier_id_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_created_at', table_name='orders')
+
+    op.drop_index('ix_order_items_product_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+
+    op.drop_index('ix_messages_conversation_id_created_at', table_name='messages')
+
+    op.drop_index('ix_link_requests_user_id_status', table_name='link_requests')
+    op.drop_index('ix_link_requests_supplier_id_status', table_name='link_requests')
+
+    op.drop_index('ix_conversations_user2_id', table_name='conversations')
+    op.drop_index('ix_conversations_user1_id', table_name='conversations')
@@ -0,0 +1,81 @@
+"""Composite (filter, created_at, id) indexes backing keyset pagination
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_conversations_user1_id', table_name='conversations')
+    op.drop_index('ix_conversations_user2_id', table_name='conversations')
+    op.create_index('ix_conversations_user1_id_created_at_id', 'conversations', ['user1_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_conversations_user2_id_created_at_id', 'conversations', ['user2_id', 'created_at', 'id'], unique=False)
+
+    op.drop_index('ix_messages_conversation_id_created_at', table_name='messages')
+    op.create_index('ix_messages_conversation_id_created_at_id', 'messages', ['conversation_id', 'created_at', 'id'], unique=False)
+
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_supplier_id_created_at', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created_at_id', 'orders', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_supplier_id_created_at_id', 'orders', ['supplier_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+
+    op.drop_index('ix_products_category', table_name='products')
+    op.drop_index('ix_products_owner_id', table_name='products')
+    op.create_index('ix_products_category_created_at_id', 'products', ['category', 'created_at', 'id'], unique=False)
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'], unique=False)
+    op.create_index('ix_products_owner_id_created_at_id', 'products', ['owner_id', 'created_at', 'id'], unique=False)
+
+    op.create_index('ix_suppliers_created_at_id', 'suppliers', ['created_at', 'id'], unique=False)
+
+    op.create_index('ix_team_members_supplier_id_created_at_id', 'team_members', ['supplier_id', 'created_at', 'id'], unique=False)
+
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_created_at_id', table_name='users')
+
+    op.drop_index('ix_team_members_supplier_id_created_at_id', table_name='team_members')
+
+    op.drop_index('ix_suppliers_created_at_id', table_name='suppliers')
+
+    op.drop_index('ix_products_owner_id_created_at_id', table_name='products')
+    op.drop_index('ix_products_created_at_id', table_name='products')
+    op.drop_index('ix_products_category_created_at_id', table_name='products')
+    op.create_index('ix_products_owner_id', 'products', ['owner_id'], unique=False)
+    op.create_index('ix_products_category', 'products', ['category'], unique=False)
+
+    op.drop_index('ix_orders_user_id_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_supplier_id_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_status_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_orders_supplier_id_created_at', 'orders', ['supplier_id', 'created_at'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False)
+
+    op.drop_index('ix_messages_conversation_id_created_at_id', table_name='messages')
+    op.create_index('ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at'], unique=False)
+
+    op.drop_index('ix_conversations_user2_id_created_at_id', table_name='conversations')
+    op.drop_index('ix_conversations_user1_id_created_at_id', table_name='conversations')
+    op.create_index('ix_conversations_user2_id', 'conversations', ['user2_id'], unique=False)
+    op.create_index('ix_conversations_user1_id', 'conversations', ['user1_id'], unique=False)
@@ -0,0 +1,33 @@
+"""Indexes for filtered and sorted product browsing
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_products_supplier_id', table_name='products')
+    op.create_index('ix_products_supplier_id_created_at_id', 'products', ['supplier_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index('ix_products_name_id', 'products', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_name_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_supplier_id_created_at_id', table_name='products')
+    op.create_index('ix_products_supplier_id', 'products', ['supplier_id'], unique=False)
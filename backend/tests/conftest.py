@@ -0,0 +1,43 @@
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Point the app at a throwaway SQLite database before anything imports it
+_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ.setdefault("LOGIN_THROTTLE_BACKEND", "memory")
+
+BACKEND = Path(__file__).resolve().parent.parent
+subprocess.run(["alembic", "upgrade", "head"], cwd=BACKEND, check=True, capture_output=True, env=os.environ)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+from .utils import auth_headers  # noqa: E402
+
+ADMIN_EMAIL = "admin@example.com"
+ADMIN_PASSWORD = "admin123"
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return auth_headers(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+
+
+@pytest.fixture(scope="session")
+def consumer_headers(client):
+    client.post(
+        "/api/register",
+        json={"email": "consumer@example.com", "password": "password1", "role": "consumer"},
+    )
+    return auth_headers(client, "consumer@example.com", "password1")
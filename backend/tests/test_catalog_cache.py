@@ -0,0 +1,63 @@
+import pytest
+
+from app import models
+from app.core.catalog_cache import PRODUCTS_VERSION, catalog_cache
+from app.database import SessionLocal
+
+from .test_orders import create_product
+
+
+def catalog_version() -> int:
+    with SessionLocal() as db:
+        return db.get(models.CatalogVersion, PRODUCTS_VERSION).version
+
+
+@pytest.fixture
+def always_sync(monkeypatch):
+    monkeypatch.setattr(catalog_cache, "sync_interval", 0)
+
+
+def test_product_writes_bump_catalog_version(client, admin_headers):
+    before = catalog_version()
+    product_id = create_product(client, admin_headers, stock=10)
+    assert catalog_version() == before + 1
+
+    response = client.put(
+        f"/api/products/{product_id}", headers=admin_headers,
+        json={"name": "Purple Carrots", "price": 3, "unit": "kg", "category": "vegetables", "stock_quantity": 10},
+    )
+    assert response.status_code == 200, response.text
+    assert catalog_version() == before + 2
+
+    assert client.delete(f"/api/products/{product_id}", headers=admin_headers).status_code == 204
+    assert catalog_version() == before + 3
+
+
+def test_stock_changes_leave_catalog_version_alone(client, admin_headers, consumer_headers):
+    product_id = create_product(client, admin_headers, stock=10)
+    before = catalog_version()
+    response = client.post(
+        "/api/orders/", headers=consumer_headers,
+        json={"shipping_address": "1 Main St", "items": [{"product_id": product_id, "quantity": 2}]},
+    )
+    assert response.status_code == 201, response.text
+    with SessionLocal() as db:
+        product = db.get(models.Product, product_id)
+        product.stock_quantity = 3
+        db.commit()
+    assert catalog_version() == before
+
+
+def test_writes_by_other_workers_clear_the_cache(client, admin_headers, always_sync):
+    product_id = create_product(client, admin_headers, stock=10)
+    client.get(f"/api/products/{product_id}", headers=admin_headers)
+    assert client.get(f"/api/products/{product_id}", headers=admin_headers).headers["X-Cache"] == "HIT"
+
+    # Another worker renames the product: no events reach this one
+    with SessionLocal() as db:
+        db.get(models.Product, product_id).name = "Renamed elsewhere"
+        db.commit()
+
+    response = client.get(f"/api/products/{product_id}", headers=admin_headers)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["name"] == "Renamed elsewhere"
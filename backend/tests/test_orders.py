@@ -0,0 +1,36 @@
+def create_product(client, headers, stock):
+    response = client.post(
+        "/api/products/", headers=headers,
+        json={"name": "Carrots", "price": 2, "unit": "kg", "category": "vegetables", "stock_quantity": stock},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def stock_of(client, headers, product_id):
+    return client.get(f"/api/products/{product_id}", headers=headers).json()["stock_quantity"]
+
+
+def test_create_order_starts_pending(client, admin_headers, consumer_headers):
+    product_id = create_product(client, admin_headers, stock=10)
+    response = client.post(
+        "/api/orders/", headers=consumer_headers,
+        json={"shipping_address": "1 Main St", "items": [{"product_id": product_id, "quantity": 4}]},
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["status"] == "pending"
+    assert stock_of(client, admin_headers, product_id) == 6
+
+
+def test_create_order_rejects_non_pending_status(client, admin_headers, consumer_headers):
+    product_id = create_product(client, admin_headers, stock=10)
+    for status in ("cancelled", "delivered"):
+        response = client.post(
+            "/api/orders/", headers=consumer_headers,
+            json={
+                "shipping_address": "1 Main St", "status": status,
+                "items": [{"product_id": product_id, "quantity": 4}],
+            },
+        )
+        assert response.status_code == 422, response.text
+    assert stock_of(client, admin_headers, product_id) == 10
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from app import models
+from app.core.revocation import revocation_list
+from app.database import SessionLocal
+
+
+def payload(user_id: int, issued_at: datetime) -> dict:
+    return {"sub": str(user_id), "iat": int((issued_at - datetime(1970, 1, 1)).total_seconds())}
+
+
+def test_revoke_user_boundary_is_whole_seconds(client):
+    user_id = 4242
+    with SessionLocal() as db:
+        revocation_list.revoke_user(db, user_id=user_id)
+        revoked_at = (
+            db.query(models.RevokedToken.revoked_at)
+            .filter(models.RevokedToken.jti == f"user:{user_id}")
+            .scalar()
+        )
+        assert revoked_at.microsecond == 0
+
+        # Issued the second before: revoked; in the same second or later: valid
+        assert revocation_list.is_revoked(db, payload(user_id, revoked_at - timedelta(seconds=1)))
+        assert not revocation_list.is_revoked(db, payload(user_id, revoked_at))
+        assert not revocation_list.is_revoked(db, payload(user_id, revoked_at + timedelta(seconds=1)))
+        # Tokens without iat cannot be placed and stay revoked
+        assert revocation_list.is_revoked(db, {"sub": str(user_id)})
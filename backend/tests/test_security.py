@@ -0,0 +1,63 @@
+import asyncio
+
+import bcrypt
+import pytest
+
+from app import models
+from app.controllers import UserController
+from app.core import security
+from app.database import SessionLocal
+
+from .utils import auth_headers
+
+
+def hash_with_rounds(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+@pytest.mark.parametrize("stored, target, expected", [
+    (4, 5, True),   # cost raised: upgrade
+    (5, 4, True),   # cost lowered: downgrade
+    (5, 5, False),
+])
+def test_password_needs_rehash_when_cost_differs(monkeypatch, stored, target, expected):
+    monkeypatch.setattr(security, "bcrypt_rounds", target)
+    assert security.password_needs_rehash(hash_with_rounds("secret", stored)) is expected
+
+
+def test_password_needs_rehash_for_unreadable_hash(monkeypatch):
+    monkeypatch.setattr(security, "bcrypt_rounds", 4)
+    assert security.password_needs_rehash("not-a-bcrypt-hash")
+
+
+@pytest.mark.parametrize("stored, target", [(4, 5), (5, 4)])
+def test_login_rehashes_to_configured_cost(client, monkeypatch, stored, target):
+    email = f"rehash-{stored}-{target}@example.com"
+    with SessionLocal() as db:
+        db.add(models.User(email=email, hashed_password=hash_with_rounds("password1", stored), role="consumer"))
+        db.commit()
+    monkeypatch.setattr(security, "bcrypt_rounds", target)
+
+    auth_headers(client, email, "password1")
+
+    with SessionLocal() as db:
+        hashed = db.query(models.User.hashed_password).filter(models.User.email == email).scalar()
+    assert security.get_hash_rounds(hashed) == target
+    assert bcrypt.checkpw(b"password1", hashed.encode("utf-8"))
+
+
+def test_user_controller_authenticate_rehashes(client, monkeypatch):
+    email = "controller-rehash@example.com"
+    with SessionLocal() as db:
+        db.add(models.User(email=email, hashed_password=hash_with_rounds("password1", 5), role="consumer"))
+        db.commit()
+    monkeypatch.setattr(security, "bcrypt_rounds", 4)
+
+    with SessionLocal() as db:
+        controller = UserController()
+        assert asyncio.run(controller.authenticate(db, email=email, password="wrong")) is None
+        user = asyncio.run(controller.authenticate(db, email=email, password="password1"))
+        assert user is not None and user.email == email
+    with SessionLocal() as db:
+        hashed = db.query(models.User.hashed_password).filter(models.User.email == email).scalar()
+    assert security.get_hash_rounds(hashed) == 4
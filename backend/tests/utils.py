@@ -0,0 +1,7 @@
+from fastapi.testclient import TestClient
+
+
+def auth_headers(client: TestClient, email: str, password: str) -> dict:
+    response = client.post("/api/token", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}